@@ -0,0 +1,275 @@
+"""
+Boston Data Dashboard - Response Cache
+In-process LRU cache for API responses with ETag/304 support, invalidated
+whenever a sync commits changed permits
+"""
+
+from collections import OrderedDict
+from datetime import date
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+
+from .compression import negotiate_encoding
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    """A fully buffered 200 response"""
+    body: bytes
+    headers: List[Tuple[bytes, bytes]]
+    etag: str
+    generation: str
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of CachedResponse entries bounded by entry count and
+    total body bytes. Entries expire after ttl seconds or as soon as they
+    are looked up under a different data generation.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key: str, generation: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.generation != generation or entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, body: bytes, headers: List[Tuple[bytes, bytes]], generation: str) -> CachedResponse:
+        entry = CachedResponse(
+            body=body,
+            headers=headers,
+            etag=make_etag(body),
+            generation=generation,
+            expires_at=time.monotonic() + self.ttl,
+        )
+        if len(body) > self.max_bytes:
+            return entry
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SyncGeneration:
+    """
+    Tracks the data version (database.get_sync_generation), asking the
+    database at most once per check_interval. The generation also carries
+    today's date because "last N days" windows shift at midnight.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Optional[int]]], check_interval: float):
+        self._loader = loader
+        self._check_interval = check_interval
+        self._version: Optional[int] = None
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _stale(self) -> bool:
+        return time.monotonic() - self._checked_at >= self._check_interval
+
+    async def current(self) -> Optional[str]:
+        """Return the current generation, or None if it cannot be determined"""
+        if self._stale():
+            async with self._lock:
+                if self._stale():
+                    try:
+                        self._version = await self._loader()
+                    except Exception as e:
+                        logger.warning(f"Could not check sync generation: {e}")
+                        return None
+                    self._checked_at = time.monotonic()
+        return format_generation(self._version)
+
+
+def format_generation(version: Optional[int]) -> str:
+    """Generation string for a data version as of today"""
+    return f"{version or 0}:{date.today().isoformat()}"
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110)"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def cache_key(path: str, query_string: bytes, encoding: Optional[str] = None) -> str:
+    """Route plus query parameters in a canonical (sorted) order and the content coding"""
+    params = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    key = f"{path}?{urlencode(params)}"
+    return f"{key}#{encoding}" if encoding else key
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware serving GET requests for the configured path prefixes
+    from a ResponseCache. Responses carry an ETag and Cache-Control, and a
+    matching If-None-Match is answered with 304 without calling the route.
+    """
+
+    def __init__(
+        self,
+        app,
+        cache: ResponseCache,
+        generation: SyncGeneration,
+        paths: Iterable[str],
+        max_age: int
+    ):
+        self.app = app
+        self.cache = cache
+        self.generation = generation
+        self.paths = tuple(paths)
+        self.cache_control = f"public, max-age={max_age}".encode("latin-1")
+        self._last_generation: Optional[str] = None
+
+    def _cacheable(self, path: str) -> bool:
+        return any(path == p or path.startswith(p + "/") for p in self.paths)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "GET"
+                or not self._cacheable(scope["path"])):
+            await self.app(scope, receive, send)
+            return
+
+        generation = await self.generation.current()
+        if generation is None:
+            await self.app(scope, receive, send)
+            return
+        if generation != self._last_generation:
+            # New sync (or new day) - everything cached so far is stale
+            if self._last_generation is not None:
+                self.cache.clear()
+            self._last_generation = generation
+
+        # Bodies are cached as sent, so each content coding is its own entry
+        encoding = negotiate_encoding(_header(scope, b"accept-encoding"))
+        key = cache_key(scope["path"], scope.get("query_string", b""), encoding)
+        entry = self.cache.get(key, generation)
+
+        if entry is None:
+            status, headers, body = await self._call_route(scope, receive)
+            if status != 200:
+                await self._send(send, status, headers, body)
+                return
+            entry = self.cache.put(key, body, headers, generation)
+
+        if_none_match = _header(scope, b"if-none-match")
+        if if_none_match and etag_matches(if_none_match, entry.etag):
+            self.cache.record_not_modified()
+            await self._send(send, 304, self._validators(entry), b"")
+            return
+
+        headers = [h for h in entry.headers if h[0].lower() not in (b"etag", b"cache-control", b"vary")]
+        await self._send(send, 200, headers + self._validators(entry), entry.body)
+
+    def _validators(self, entry: CachedResponse) -> List[Tuple[bytes, bytes]]:
+        vary = [h for h in entry.headers if h[0].lower() == b"vary"]
+        return [
+            (b"etag", entry.etag.encode("latin-1")),
+            (b"cache-control", self.cache_control),
+        ] + vary
+
+    async def _call_route(self, scope, receive) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+        """Run the wrapped app and buffer its response"""
+        status = 500
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+
+        async def capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        return status, headers, b"".join(chunks)
+
+    @staticmethod
+    async def _send(send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        if status == 304:
+            headers = [h for h in headers if h[0].lower() != b"content-length"]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
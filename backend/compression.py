@@ -0,0 +1,160 @@
+"""
+Boston Data Dashboard - Response Compression
+Negotiated brotli/gzip compression for text responses above a size threshold
+"""
+
+from typing import List, Optional, Tuple
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    # brotli not installed, only gzip is offered
+    brotli = None
+
+# Content types worth compressing (JSON, HTML, CSS, JS, SVG, plain text)
+COMPRESSIBLE_TYPES = (
+    b"application/json", b"application/javascript", b"image/svg+xml", b"text/",
+)
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Encodings this server can produce, most preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding for an Accept-Encoding header: the supported
+    coding with the highest q-value, preferring brotli on ties.
+    Returns None when the response should be sent uncompressed.
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in supported_encodings():
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps output deterministic so ETags of compressed bodies are stable
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def _is_compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    content_type = b""
+    for key, value in headers:
+        name = key.lower()
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _with_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    for i, (key, value) in enumerate(headers):
+        if key.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[i] = (key, value + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing text responses of at least minimum_size
+    bytes with the best coding the client accepts. Compressible responses
+    always carry Vary: Accept-Encoding, and a strong ETag on a compressed
+    body is weakened since it describes the uncompressed representation.
+    Other responses stream through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int, gzip_level: int, brotli_quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding)
+
+        start_message = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def wrapped_send(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if message["status"] == 304:
+                    passthrough = True
+                    await send({**message, "headers": _with_vary(headers)})
+                    return
+                if not _is_compressible(headers):
+                    passthrough = True
+                    await send(message)
+                    return
+                headers = _with_vary(headers)
+                if encoding is None or message["status"] < 200 or message["status"] == 204:
+                    passthrough = True
+                    await send({**message, "headers": headers})
+                    return
+                start_message = {**message, "headers": headers}
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            await self._send_buffered(send, start_message, b"".join(chunks), encoding)
+
+        await self.app(scope, receive, wrapped_send)
+
+    async def _send_buffered(self, send, start_message, body: bytes, encoding: str):
+        headers = start_message["headers"]
+        if len(body) >= self.minimum_size:
+            body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            headers = [
+                (key, b"W/" + value if key.lower() == b"etag" and not value.startswith(b"W/") else value)
+                for key, value in headers
+                if key.lower() != b"content-length"
+            ]
+            headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ]
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -4,6 +4,7 @@ Environment variable management for database and sync settings
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Load .env file if it exists (for local development)
@@ -26,12 +27,72 @@ class Settings:
         "postgresql://localhost/boston_permits"
     )
 
+    # Connection pool configuration
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_MAX_IDLE: float = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+    DB_POOL_MAX_LIFETIME: float = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+
     # Sync job configuration
     SYNC_DAYS_BACK: int = int(os.getenv("SYNC_DAYS_BACK", "90"))
 
     # CKAN API configuration
     CKAN_RESOURCE_ID: str = "6ddcd912-32a0-43df-9908-63574f8c7e77"
-    CKAN_SQL_API_URL: str = "https://data.boston.gov/api/3/action/datastore_search_sql"
+    CKAN_SQL_API_URL: str = os.getenv(
+        "CKAN_SQL_API_URL",
+        "https://data.boston.gov/api/3/action/datastore_search_sql"
+    )
+    CKAN_PAGE_SIZE: int = int(os.getenv("CKAN_PAGE_SIZE", "10000"))
+    CKAN_REQUEST_DELAY: float = float(os.getenv("CKAN_REQUEST_DELAY", "0"))
+
+    # Pages buffered between the fetch, normalize and load stages of a sync
+    SYNC_QUEUE_DEPTH: int = int(os.getenv("SYNC_QUEUE_DEPTH", "2"))
+
+    # Historical backfill (python -m backend.sync_job --backfill): days of
+    # history, window length, concurrent window fetches, normalize
+    # processes (0 = one per CPU, 1 = inline), CKAN request rate limit
+    # (0 = unlimited) and seconds between progress log lines
+    BACKFILL_DAYS: int = int(os.getenv("BACKFILL_DAYS", "3650"))
+    BACKFILL_WINDOW_DAYS: int = int(os.getenv("BACKFILL_WINDOW_DAYS", "30"))
+    BACKFILL_WORKERS: int = int(os.getenv("BACKFILL_WORKERS", "4"))
+    BACKFILL_PROCESSES: int = int(os.getenv("BACKFILL_PROCESSES", "0"))
+    BACKFILL_REQUESTS_PER_SECOND: float = float(os.getenv("BACKFILL_REQUESTS_PER_SECOND", "4"))
+    BACKFILL_PROGRESS_SECONDS: float = float(os.getenv("BACKFILL_PROGRESS_SECONDS", "10"))
+
+    # Response cache configuration
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    # Seconds between checks for a newer data version (committed sync pages)
+    CACHE_GENERATION_CHECK_SECONDS: float = float(os.getenv("CACHE_GENERATION_CHECK_SECONDS", "30"))
+    # max-age sent to browsers for cached API responses
+    HTTP_CACHE_MAX_AGE: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+    # Response compression: bodies smaller than the minimum are sent as-is
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "5"))
+    # max-age for static assets other than HTML (HTML is always revalidated)
+    STATIC_MAX_AGE: int = int(os.getenv("STATIC_MAX_AGE", "86400"))
+
+    # Density tiles: disk cache location, cells per tile side, the days
+    # window precomputed by the sync job and the highest precomputed zoom
+    TILE_CACHE_DIR: str = os.getenv(
+        "TILE_CACHE_DIR",
+        os.path.join(tempfile.gettempdir(), "boston-permit-tiles")
+    )
+    TILE_GRID_SIZE: int = int(os.getenv("TILE_GRID_SIZE", "32"))
+    TILE_DEFAULT_DAYS: int = int(os.getenv("TILE_DEFAULT_DAYS", "365"))
+    TILE_PRECOMPUTE_MAX_ZOOM: int = int(os.getenv("TILE_PRECOMPUTE_MAX_ZOOM", "12"))
+    # Tiles for other days windows are kept in memory, at most this many
+    TILE_MEMORY_CACHE_ENTRIES: int = int(os.getenv("TILE_MEMORY_CACHE_ENTRIES", "2048"))
+
+    # Statements slower than this many ms are logged with params (0 disables);
+    # their estimated plan is logged too, at most once per query name per interval
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "250"))
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    SLOW_QUERY_EXPLAIN_INTERVAL: float = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "60"))
 
     # Server configuration
     PORT: int = int(os.getenv("PORT", "8000"))
@@ -3,36 +3,202 @@ Boston Data Dashboard - Database Operations
 PostgreSQL connection and schema management with raw SQL (no ORM)
 """
 
-import psycopg
+from psycopg.pq import TransactionStatus
 from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from datetime import datetime
-from typing import Optional, Dict, List
+from datetime import date, datetime
+from typing import Any, Callable, Optional, Dict, Iterable, List
+import asyncio
+import json
 import logging
+import threading
+import time
 
 from .config import settings
+from .normalize import PERMIT_COLUMNS, PermitBatch, normalize_permit
+from .metrics import DB_QUERY_DURATION
+from .query_stats import InstrumentedCursor
+from .timing import record_db_time
 
 logger = logging.getLogger(__name__)
 
 
+# Shared connection pool, created lazily on first use
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+# Bounded executor for running blocking database work off the event loop
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Acquire latency tracking (time spent waiting for a pooled connection)
+_acquire_lock = threading.Lock()
+_acquire_count = 0
+_acquire_total_ms = 0.0
+_acquire_max_ms = 0.0
+
+
+def get_pool() -> ConnectionPool:
+    """Return the shared connection pool, opening it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    settings.DATABASE_URL,
+                    min_size=settings.DB_POOL_MIN_SIZE,
+                    max_size=settings.DB_POOL_MAX_SIZE,
+                    timeout=settings.DB_POOL_TIMEOUT,
+                    max_idle=settings.DB_POOL_MAX_IDLE,
+                    max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+                    kwargs={"row_factory": dict_row, "cursor_factory": InstrumentedCursor},
+                    name="boston-permits",
+                    open=True,
+                )
+                logger.info(
+                    f"Opened connection pool "
+                    f"(min={settings.DB_POOL_MIN_SIZE}, max={settings.DB_POOL_MAX_SIZE})"
+                )
+    return _pool
+
+
+def close_pool():
+    """Close the shared connection pool (on shutdown or at the end of a job)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+            logger.info("Closed connection pool")
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    Return the executor used by async endpoints for database work.
+    Sized to the pool so a worker thread never waits for a connection.
+    """
+    global _executor
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.DB_POOL_MAX_SIZE,
+                    thread_name_prefix="db"
+                )
+    return _executor
+
+
+def shutdown_db_executor():
+    """Stop the database executor, waiting for in-flight work"""
+    global _executor
+    with _pool_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking database function on the bounded executor so the
+    event loop keeps serving other requests while it waits on Postgres.
+    Its run time is charged to the current request's Server-Timing and
+    to the db_query_duration_seconds histogram under the function's name.
+    """
+    loop = asyncio.get_running_loop()
+    elapsed = [0.0]
+
+    def timed():
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed[0] = (time.perf_counter() - start) * 1000
+
+    try:
+        return await loop.run_in_executor(get_db_executor(), timed)
+    finally:
+        record_db_time(elapsed[0])
+        DB_QUERY_DURATION.observe(elapsed[0] / 1000, _call_name(func))
+
+
+def _call_name(func: Callable) -> str:
+    """Metric name of a run_db function: _query_permits -> permits"""
+    name = getattr(func, "__name__", "unknown")
+    return name.lstrip("_").removeprefix("query_")
+
+
+def _record_acquire(elapsed_ms: float):
+    global _acquire_count, _acquire_total_ms, _acquire_max_ms
+    with _acquire_lock:
+        _acquire_count += 1
+        _acquire_total_ms += elapsed_ms
+        _acquire_max_ms = max(_acquire_max_ms, elapsed_ms)
+
+
+def get_pool_stats() -> Dict:
+    """
+    Snapshot of pool usage: connections in use, requests waiting
+    and acquire latency since process start.
+    """
+    if _pool is None:
+        return {"status": "closed"}
+
+    stats = _pool.get_stats()
+    pool_size = stats.get("pool_size", 0)
+    available = stats.get("pool_available", 0)
+
+    with _acquire_lock:
+        count = _acquire_count
+        avg_ms = _acquire_total_ms / count if count else 0.0
+        max_ms = _acquire_max_ms
+
+    return {
+        "status": "open",
+        "min_size": stats.get("pool_min", settings.DB_POOL_MIN_SIZE),
+        "max_size": stats.get("pool_max", settings.DB_POOL_MAX_SIZE),
+        "size": pool_size,
+        "available": available,
+        "in_use": pool_size - available,
+        "waiting": stats.get("requests_waiting", 0),
+        "requests": stats.get("requests_num", 0),
+        "requests_queued": stats.get("requests_queued", 0),
+        "requests_errors": stats.get("requests_errors", 0),
+        "connections_opened": stats.get("connections_num", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+        "acquire_count": count,
+        "acquire_avg_ms": round(avg_ms, 3),
+        "acquire_max_ms": round(max_ms, 3),
+    }
+
+
 @contextmanager
 def get_db_connection():
     """
     Context manager for database connections.
-    Returns connection with dict row factory for dict-like row access.
+    Borrows a connection from the shared pool with dict row factory for
+    dict-like row access. Uncommitted work is rolled back before the
+    connection is returned to the pool.
     """
-    conn = None
+    pool = get_pool()
+
+    start = time.perf_counter()
+    conn = pool.getconn()
+    _record_acquire((time.perf_counter() - start) * 1000)
+
     try:
-        conn = psycopg.connect(settings.DATABASE_URL, row_factory=dict_row)
         yield conn
     except Exception as e:
-        if conn:
+        if not conn.closed:
             conn.rollback()
         logger.error(f"Database connection error: {e}")
         raise
     finally:
-        if conn:
-            conn.close()
+        try:
+            if not conn.closed and conn.info.transaction_status == TransactionStatus.INTRANS:
+                conn.rollback()
+        finally:
+            pool.putconn(conn)
 
 
 def init_db():
@@ -68,11 +234,61 @@ def init_db():
                 )
             """)
 
-            # Create indexes
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_permits_zip ON permits(zip)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_permits_issued_date ON permits(issued_date DESC)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_permits_work_type ON permits(work_type)")
+            # Hash of the normalized row, used to skip no-op updates
+            cur.execute("ALTER TABLE permits ADD COLUMN IF NOT EXISTS content_hash VARCHAR(32)")
+
+            # Full-text search document for /api/search, maintained by
+            # Postgres on every write. Weights rank description matches
+            # above address, applicant and comments (A > B > C > D).
+            cur.execute("""
+                ALTER TABLE permits ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english', coalesce(description, '')), 'A') ||
+                    setweight(to_tsvector('english', coalesce(address, '')), 'B') ||
+                    setweight(to_tsvector('english', coalesce(applicant, '')), 'C') ||
+                    setweight(to_tsvector('english', coalesce(comments, '')), 'D')
+                ) STORED
+            """)
+
+            # Create indexes. Listing, count and map queries all filter on
+            # an issued_date window, optionally narrowed by zip or
+            # work_type, and page by (issued_date, id) descending.
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_permits_zip_issued_date "
+                "ON permits(zip, issued_date DESC, id DESC)"
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_permits_work_type_issued_date "
+                "ON permits(work_type, issued_date DESC, id DESC)"
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_permits_zip_work_type_issued_date "
+                "ON permits(zip, work_type, issued_date DESC, id DESC)"
+            )
+            # Date-only windows: keyset pagination, and index-only scans for
+            # counts, map points, clusters, tiles and the daily rollup via
+            # the included columns
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_permits_issued_date_covering "
+                "ON permits(issued_date DESC, id DESC) "
+                "INCLUDE (zip, work_type, permit_number, latitude, longitude, declared_valuation)"
+            )
+            # Superseded by the composite indexes above
+            for index in ("idx_permits_zip", "idx_permits_work_type",
+                          "idx_permits_issued_date", "idx_permits_issued_date_id"):
+                cur.execute(f"DROP INDEX IF EXISTS {index}")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_permits_status ON permits(status)")
+            # Spatial index for viewport (bbox) queries; the expression must
+            # match the one used by main._permit_filters
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_permits_location "
+                "ON permits USING gist (point(longitude::float8, latitude::float8))"
+            )
+
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_permits_search "
+                "ON permits USING gin (search_vector)"
+            )
 
             # Create sync_log table
             cur.execute("""
@@ -87,6 +303,90 @@ def init_db():
                     error_message TEXT
                 )
             """)
+            cur.execute("ALTER TABLE sync_log ADD COLUMN IF NOT EXISTS records_quarantined INTEGER")
+            cur.execute("ALTER TABLE sync_log ADD COLUMN IF NOT EXISTS records_unchanged INTEGER")
+            # Run performance (see record_sync_performance)
+            cur.execute("ALTER TABLE sync_log ADD COLUMN IF NOT EXISTS duration_seconds REAL")
+            cur.execute("ALTER TABLE sync_log ADD COLUMN IF NOT EXISTS records_per_second REAL")
+            cur.execute("ALTER TABLE sync_log ADD COLUMN IF NOT EXISTS pages_fetched INTEGER")
+            cur.execute("ALTER TABLE sync_log ADD COLUMN IF NOT EXISTS bytes_downloaded BIGINT")
+            cur.execute("ALTER TABLE sync_log ADD COLUMN IF NOT EXISTS peak_rss_bytes BIGINT")
+            cur.execute("ALTER TABLE sync_log ADD COLUMN IF NOT EXISTS phase_seconds JSONB")
+
+            # Pre-aggregated counts and valuation per (day, zip, work_type)
+            # for /api/stats. NULL zip/work_type are stored as '' so they can
+            # be part of the primary key.
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS permit_daily_rollup (
+                    day DATE NOT NULL,
+                    zip VARCHAR(10) NOT NULL DEFAULT '',
+                    work_type VARCHAR(50) NOT NULL DEFAULT '',
+                    permit_count INTEGER NOT NULL,
+                    valuation_sum DECIMAL(18,2) NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, zip, work_type)
+                )
+            """)
+            cur.execute("SELECT EXISTS (SELECT 1 FROM permit_daily_rollup) AS populated")
+            if not cur.fetchone()['populated']:
+                refresh_daily_rollup(conn)
+
+            # Single-row data version, bumped in the same transaction as
+            # every page that changes permits (see load_permit_rows). The
+            # API's cache generation is keyed to it. Seeded from sync_log so
+            # it never repeats an earlier sync id-based generation.
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS data_version (
+                    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                    version BIGINT NOT NULL
+                )
+            """)
+            cur.execute("""
+                INSERT INTO data_version (id, version)
+                SELECT TRUE, COALESCE(MAX(id), 0) FROM sync_log
+                ON CONFLICT (id) DO NOTHING
+            """)
+
+            # Create quarantine table for records the bulk loader rejects
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS permits_quarantine (
+                    id SERIAL PRIMARY KEY,
+                    sync_id INTEGER,
+                    permit_number VARCHAR(255),
+                    reason TEXT,
+                    record JSONB,
+                    quarantined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Create checkpoint table so an interrupted sync or backfill
+            # resumes where it stopped. One row per date window; the
+            # high-water mark is the (issued_date, _id) CKAN key of the last
+            # committed record, in the sync's newest-first order, and the
+            # head is the key of the window's first (newest) record.
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS sync_checkpoints (
+                    job VARCHAR(20) NOT NULL,
+                    window_start DATE NOT NULL,
+                    window_end DATE NOT NULL,
+                    records_committed INTEGER NOT NULL DEFAULT 0,
+                    last_issued_date TEXT,
+                    last_id BIGINT,
+                    head_issued_date TEXT,
+                    head_id BIGINT,
+                    sync_id INTEGER,
+                    completed_at TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (job, window_start, window_end)
+                )
+            """)
+            cur.execute("""
+                ALTER TABLE sync_checkpoints
+                ADD COLUMN IF NOT EXISTS records_committed INTEGER NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS last_issued_date TEXT,
+                ADD COLUMN IF NOT EXISTS last_id BIGINT,
+                ADD COLUMN IF NOT EXISTS head_issued_date TEXT,
+                ADD COLUMN IF NOT EXISTS head_id BIGINT
+            """)
 
             conn.commit()
             logger.info("Database schema initialized successfully")
@@ -95,58 +395,22 @@ def init_db():
 def upsert_permit(conn, record: Dict) -> tuple[bool, str]:
     """
     Insert or update a permit record.
+    Existing rows are only rewritten (and updated_at bumped) when their
+    content hash differs.
     Returns (was_inserted, permit_number)
     """
-    with conn.cursor() as cur:
-        # Parse declared_valuation - handle string format from API
-        valuation = None
-        if record.get('declared_valuation'):
-            try:
-                val_str = str(record['declared_valuation']).replace('$', '').replace(',', '')
-                valuation = float(val_str) if val_str else None
-            except (ValueError, AttributeError):
-                valuation = None
-
-        # Parse total_fees
-        fees = None
-        if record.get('total_fees'):
-            try:
-                fee_str = str(record['total_fees']).replace('$', '').replace(',', '')
-                fees = float(fee_str) if fee_str else None
-            except (ValueError, AttributeError):
-                fees = None
-
-        # Parse sq_feet
-        sq_feet = None
-        if record.get('sq_feet'):
-            try:
-                sq_feet = int(float(record['sq_feet']))
-            except (ValueError, TypeError):
-                sq_feet = None
-
-        # Parse coordinates - use API field names (y_latitude, x_longitude)
-        latitude = None
-        longitude = None
-        if record.get('y_latitude') and record.get('x_longitude'):
-            try:
-                lat = float(record['y_latitude'])
-                lng = float(record['x_longitude'])
-                # Validate Boston coordinates
-                if 42.2 <= lat <= 42.4 and -71.2 <= lng <= -70.9:
-                    latitude = lat
-                    longitude = lng
-            except (ValueError, TypeError):
-                pass
+    row = normalize_permit(record)
 
+    with conn.cursor() as cur:
         cur.execute("""
             INSERT INTO permits (
                 permit_number, work_type, permit_type_descr, description, comments,
                 applicant, declared_valuation, total_fees, issued_date, expiration_date,
                 status, occupancy_type, sq_feet, address, zip,
-                ward, property_id, parcel_id, latitude, longitude, updated_at
+                ward, property_id, parcel_id, latitude, longitude, content_hash, updated_at
             ) VALUES (
                 %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
             )
             ON CONFLICT (permit_number) DO UPDATE SET
                 work_type = EXCLUDED.work_type,
@@ -168,31 +432,11 @@ def upsert_permit(conn, record: Dict) -> tuple[bool, str]:
                 parcel_id = EXCLUDED.parcel_id,
                 latitude = EXCLUDED.latitude,
                 longitude = EXCLUDED.longitude,
+                content_hash = EXCLUDED.content_hash,
                 updated_at = CURRENT_TIMESTAMP
+            WHERE permits.content_hash IS DISTINCT FROM EXCLUDED.content_hash
             RETURNING (xmax = 0) AS inserted
-        """, (
-            record.get('permitnumber'),
-            record.get('worktype'),
-            record.get('permittypedescr'),
-            record.get('description'),
-            record.get('comments'),
-            record.get('applicant'),
-            valuation,
-            fees,
-            record.get('issued_date'),
-            record.get('expiration_date'),
-            record.get('status'),
-            record.get('occupancytype'),
-            sq_feet,
-            record.get('address'),
-            record.get('zip'),
-            record.get('ward'),
-            record.get('property_id'),
-            record.get('parcel_id'),
-            latitude,
-            longitude,
-            datetime.now()
-        ))
+        """, row + (datetime.now(),))
 
         result = cur.fetchone()
         if result:
@@ -202,6 +446,168 @@ def upsert_permit(conn, record: Dict) -> tuple[bool, str]:
         return was_inserted, record.get('permitnumber')
 
 
+def normalize_records(records: List[Dict]) -> PermitBatch:
+    """
+    Normalize a batch of CKAN records for the bulk loader.
+    The batch holds one row per permit number - when a number appears
+    more than once the last record wins, as with sequential upserts -
+    and (record, reason) rejects.
+    """
+    rows = {}
+    rejected = []
+    for record in records:
+        try:
+            row = normalize_permit(record)
+        except ValueError as e:
+            rejected.append((record, str(e)))
+            continue
+        rows[row[0]] = row
+    return PermitBatch(list(rows.values()), rejected)
+
+
+def bulk_upsert_permits(conn, records: List[Dict], sync_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Insert or update a batch of permit records in a few round-trips.
+
+    Rows are normalized in Python, streamed into a temporary staging table
+    with COPY and merged into permits with a single INSERT ... ON CONFLICT.
+    Existing rows whose content hash matches are left untouched.
+    Records that fail normalization are written to permits_quarantine with
+    the reason instead of aborting the batch.
+
+    Does not commit - the caller owns the transaction, and should pass
+    the returned touched_days to refresh_daily_rollup before committing.
+    Returns counts: staged, inserted, updated (content changed),
+    unchanged, quarantined, plus touched_days
+    """
+    return load_permit_rows(conn, normalize_records(records), sync_id=sync_id)
+
+
+def load_permit_rows(conn, batch: PermitBatch, sync_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    COPY an already-normalized batch into staging and merge it into permits.
+    See bulk_upsert_permits; the batch comes from normalize_records.
+    """
+    columns = ", ".join(PERMIT_COLUMNS)
+    updates = ",\n                ".join(
+        f"{column} = EXCLUDED.{column}" for column in PERMIT_COLUMNS[1:]
+    )
+
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS permits_staging
+            ON COMMIT DELETE ROWS
+            AS SELECT {columns} FROM permits WITH NO DATA
+        """)
+        cur.execute("TRUNCATE permits_staging")
+
+        with cur.copy(f"COPY permits_staging ({columns}) FROM STDIN") as copy:
+            for row in batch.rows:
+                copy.write_row(row)
+
+        # Issue dates (old and new) of rows about to be inserted or changed
+        cur.execute("""
+            /* load.touched_days */
+            SELECT DISTINCT touched.day
+            FROM permits_staging s
+            LEFT JOIN permits p ON p.permit_number = s.permit_number
+            CROSS JOIN LATERAL (VALUES (s.issued_date), (p.issued_date)) AS touched(day)
+            WHERE p.content_hash IS DISTINCT FROM s.content_hash
+              AND touched.day IS NOT NULL
+        """)
+        touched_days = {row['day'] for row in cur.fetchall()}
+
+        cur.execute(f"""
+            /* load.merge */
+            WITH upserted AS (
+                INSERT INTO permits ({columns}, updated_at)
+                SELECT {columns}, CURRENT_TIMESTAMP FROM permits_staging
+                ON CONFLICT (permit_number) DO UPDATE SET
+                {updates},
+                updated_at = CURRENT_TIMESTAMP
+                WHERE permits.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                COUNT(*) FILTER (WHERE inserted) AS inserted,
+                COUNT(*) FILTER (WHERE NOT inserted) AS updated
+            FROM upserted
+        """)
+        merged = cur.fetchone()
+
+        if merged['inserted'] or merged['updated']:
+            # Commits (or rolls back) with the page, so readers never see
+            # a new generation before its data
+            cur.execute("/* load.data_version */ UPDATE data_version SET version = version + 1")
+
+        if batch.rejected:
+            quarantine_records(conn, batch.rejected, sync_id=sync_id)
+
+    return {
+        "staged": batch.size,
+        "inserted": merged['inserted'],
+        "updated": merged['updated'],
+        "unchanged": batch.size - merged['inserted'] - merged['updated'],
+        "quarantined": len(batch.rejected),
+        "touched_days": touched_days,
+    }
+
+
+def refresh_daily_rollup(conn, days: Optional[Iterable[date]] = None) -> int:
+    """
+    Recompute permit_daily_rollup for the given issue dates, or rebuild it
+    entirely when days is None. Does not commit.
+    Returns the number of rollup rows written.
+    """
+    with conn.cursor() as cur:
+        if days is None:
+            cur.execute("DELETE FROM permit_daily_rollup")
+            day_filter = "issued_date IS NOT NULL"
+            params = []
+        else:
+            days = sorted(days)
+            if not days:
+                return 0
+            cur.execute("DELETE FROM permit_daily_rollup WHERE day = ANY(%s)", (days,))
+            day_filter = "issued_date = ANY(%s)"
+            params = [days]
+
+        cur.execute(f"""
+            /* rollup.refresh */
+            INSERT INTO permit_daily_rollup (day, zip, work_type, permit_count, valuation_sum)
+            SELECT
+                issued_date,
+                COALESCE(zip, ''),
+                COALESCE(work_type, ''),
+                COUNT(*),
+                COALESCE(SUM(declared_valuation), 0)
+            FROM permits
+            WHERE {day_filter}
+            GROUP BY 1, 2, 3
+        """, params)
+        return cur.rowcount
+
+
+def quarantine_records(conn, rejected: List[tuple], sync_id: Optional[int] = None):
+    """Store (record, reason) pairs that could not be loaded for later inspection"""
+    with conn.cursor() as cur:
+        cur.executemany("""
+            /* load.quarantine */
+            INSERT INTO permits_quarantine (sync_id, permit_number, reason, record)
+            VALUES (%s, %s, %s, %s::jsonb)
+        """, [
+            (
+                sync_id,
+                str(record.get('permitnumber'))[:255] if record.get('permitnumber') else None,
+                reason,
+                json.dumps(record, default=str).replace('\\u0000', '')
+            )
+            for record, reason in rejected
+        ])
+    for record, reason in rejected:
+        logger.warning(f"Quarantined permit {record.get('permitnumber')}: {reason}")
+
+
 def create_sync_log(conn) -> int:
     """Create a new sync log entry and return its ID"""
     with conn.cursor() as cur:
@@ -223,7 +629,9 @@ def update_sync_log(
     records_inserted: int,
     records_updated: int,
     status: str,
-    error_message: Optional[str] = None
+    error_message: Optional[str] = None,
+    records_quarantined: int = 0,
+    records_unchanged: int = 0
 ):
     """Update sync log with completion details"""
     with conn.cursor() as cur:
@@ -234,16 +642,172 @@ def update_sync_log(
                 records_fetched = %s,
                 records_inserted = %s,
                 records_updated = %s,
+                records_unchanged = %s,
+                records_quarantined = %s,
                 error_message = %s
             WHERE id = %s
-        """, (status, records_fetched, records_inserted, records_updated, error_message, sync_id))
+        """, (
+            status, records_fetched, records_inserted, records_updated,
+            records_unchanged, records_quarantined, error_message, sync_id
+        ))
+        conn.commit()
+
+
+def record_sync_performance(conn, sync_id: int, performance: Dict):
+    """
+    Store a sync run's wall time, records/sec, pages, bytes downloaded,
+    peak RSS and per-phase seconds (from sync_job.SyncStats.summary)
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE sync_log
+            SET duration_seconds = %s,
+                records_per_second = %s,
+                pages_fetched = %s,
+                bytes_downloaded = %s,
+                peak_rss_bytes = %s,
+                phase_seconds = %s::jsonb
+            WHERE id = %s
+        """, (
+            performance["duration_seconds"], performance["records_per_second"],
+            performance["pages_fetched"], performance["bytes_downloaded"],
+            performance["peak_rss_bytes"], json.dumps(performance["phase_seconds"]), sync_id
+        ))
+        conn.commit()
+
+
+def get_checkpoints(conn, job: Optional[str] = None) -> List[Dict]:
+    """Checkpointed windows, newest first, for one job ('sync' or 'backfill') or all"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            /* checkpoints.list */
+            SELECT job, window_start, window_end, records_committed,
+                   last_issued_date, last_id, head_issued_date, head_id,
+                   sync_id, completed_at, updated_at
+            FROM sync_checkpoints
+            WHERE %(job)s::text IS NULL OR job = %(job)s
+            ORDER BY job, window_start DESC
+        """, {"job": job})
+        return cur.fetchall()
+
+
+def plan_checkpoints(conn, job: str, windows: List[tuple], sync_id: int):
+    """
+    Replace a job's checkpoints with a fresh set of [start, end) windows,
+    none of them started yet
+    """
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM sync_checkpoints WHERE job = %s", (job,))
+        cur.executemany("""
+            /* checkpoints.plan */
+            INSERT INTO sync_checkpoints (job, window_start, window_end, sync_id)
+            VALUES (%s, %s, %s, %s)
+        """, [(job, start, end, sync_id) for start, end in windows])
+        conn.commit()
+
+
+def advance_checkpoint(
+    conn,
+    job: str,
+    window: tuple,
+    records_committed: int,
+    first_key: tuple,
+    last_key: tuple,
+    sync_id: int
+):
+    """
+    Move a window's high-water mark to last_key, the (issued_date, _id)
+    of the last record loaded. The first page's first_key is kept as the
+    window's head. Does not commit: callers commit it in the same
+    transaction as the page it covers, so the mark never gets ahead of
+    (or behind) the permits actually loaded.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            /* checkpoints.advance */
+            UPDATE sync_checkpoints
+            SET records_committed = %s, last_issued_date = %s, last_id = %s,
+                head_issued_date = COALESCE(head_issued_date, %s),
+                head_id = COALESCE(head_id, %s),
+                sync_id = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE job = %s AND window_start = %s AND window_end = %s
+        """, (
+            records_committed, last_key[0], last_key[1], first_key[0], first_key[1],
+            sync_id, job, window[0], window[1]
+        ))
+
+
+def complete_checkpoint(conn, job: str, window: tuple, sync_id: int):
+    """Mark a window finished (does not commit)"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            /* checkpoints.complete */
+            UPDATE sync_checkpoints
+            SET completed_at = CURRENT_TIMESTAMP, sync_id = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE job = %s AND window_start = %s AND window_end = %s
+        """, (sync_id, job, window[0], window[1]))
+
+
+# pg_advisory_lock key held by sync_permits and backfill_permits for their
+# whole run: both rewrite the same permits and permit_daily_rollup days
+SYNC_LOCK_KEY = 7_104_110_042
+
+
+@contextmanager
+def sync_lock(conn):
+    """
+    Hold the sync advisory lock on conn for the block. Raises RuntimeError
+    straight away if another sync or backfill already holds it.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_lock(%s) AS locked", (SYNC_LOCK_KEY,))
+        locked = cur.fetchone()['locked']
+    conn.commit()
+    if not locked:
+        raise RuntimeError("Another sync or backfill is already running")
+
+    try:
+        yield
+    finally:
+        # Session-level, so it must be released before the connection goes
+        # back to the pool (a closed connection has already dropped it)
+        if not conn.closed:
+            if conn.info.transaction_status == TransactionStatus.INERROR:
+                conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (SYNC_LOCK_KEY,))
+            conn.commit()
+
+
+def reset_checkpoints(conn, job: Optional[str] = None) -> int:
+    """Forget checkpoints for one job or all; the next run starts from scratch"""
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM sync_checkpoints WHERE %(job)s::text IS NULL OR job = %(job)s",
+            {"job": job}
+        )
+        deleted = cur.rowcount
         conn.commit()
+        return deleted
+
+
+def get_sync_generation(conn) -> Optional[int]:
+    """
+    Current data version. It changes whenever a committed page changes
+    permits - including pages of a sync that later fails - so cached API
+    responses are keyed to it.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT version AS generation FROM data_version")
+        row = cur.fetchone()
+        return row['generation'] if row else None
 
 
 def get_last_sync(conn) -> Optional[Dict]:
     """Get the most recent sync log entry"""
     with conn.cursor() as cur:
         cur.execute("""
+            /* sync_log.last */
             SELECT * FROM sync_log
             ORDER BY started_at DESC
             LIMIT 1
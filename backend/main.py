@@ -5,15 +5,38 @@ API endpoints for building permits data
 
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from psycopg.rows import tuple_row
 from typing import Optional
 from datetime import datetime
 from pathlib import Path
+import base64
+import json
 import logging
+import math
+import re
 
 from .config import settings
-from .database import get_db_connection, init_db, get_last_sync
+from .serialization import FastJSONResponse
+from .cache import ResponseCache, ResponseCacheMiddleware, SyncGeneration
+from .compression import CompressionMiddleware
+from .static import CachedStaticFiles
+from .timing import ServerTimingMiddleware
+from .metrics import MetricsMiddleware
+from .query_stats import query_stats
+from . import metrics
+from .tiles import build_tile, covers_boston, empty_tile, get_tile, get_tile_cache_stats, validate_tile
+from .normalize import bbox_contains_boston
+from .database import (
+    get_db_connection,
+    init_db,
+    get_last_sync,
+    get_sync_generation,
+    close_pool,
+    get_pool_stats,
+    run_db,
+    shutdown_db_executor
+)
 from decimal import Decimal
 from datetime import date, datetime as dt
 
@@ -41,8 +64,53 @@ def serialize_row(row: dict) -> dict:
 app = FastAPI(
     title="Boston Data Dashboard",
     description="Track building permits and development activity in Boston",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
+)
+
+# Compress text responses for slow (mobile) links. Added first so it is
+# the innermost middleware: the response cache then stores compressed
+# bodies per content coding and serves them without recompressing.
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY
+)
+
+
+def _load_sync_generation() -> Optional[int]:
+    with get_db_connection() as conn:
+        return get_sync_generation(conn)
+
+
+# Data only changes when a sync commits pages, so read endpoints are served
+# from an in-process cache keyed to the data version. Added
+# before CORS so CORS headers are computed per request, not cached.
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl=settings.RESPONSE_CACHE_TTL
 )
+sync_generation = SyncGeneration(
+    loader=lambda: run_db(_load_sync_generation),
+    check_interval=settings.CACHE_GENERATION_CHECK_SECONDS
+)
+CACHED_PATHS = ["/api/permits", "/api/search", "/api/map", "/api/tiles", "/api/stats", "/api/neighborhoods"]
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    generation=sync_generation,
+    paths=CACHED_PATHS,
+    max_age=settings.HTTP_CACHE_MAX_AGE
+)
+
+# Server-Timing (db, app) on every response; outside the cache so hits
+# report their own timing
+app.add_middleware(ServerTimingMiddleware)
+
+# Per-route request counts and latency for /metrics, cache hits included
+app.add_middleware(MetricsMiddleware, router=app.router)
 
 # CORS for local development
 app.add_middleware(
@@ -58,13 +126,20 @@ app.add_middleware(
 async def startup():
     logger.info("Starting Boston Data Dashboard API")
     try:
-        init_db()
+        await run_db(init_db)
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    logger.info("Shutting down Boston Data Dashboard API")
+    shutdown_db_executor()
+    close_pool()
+
+
 # Work type code mappings for human-readable labels
 WORK_TYPE_LABELS = {
     "ELECTRICAL": "Electrical",
@@ -88,6 +163,279 @@ WORK_TYPE_LABELS = {
     "OTHER": "Other"
 }
 
+# Permit columns exposed by the API (internal bookkeeping such as
+# content_hash is never returned)
+PERMIT_FIELDS = (
+    "id", "permit_number", "work_type", "permit_type_descr", "description",
+    "comments", "applicant", "declared_valuation", "total_fees", "issued_date",
+    "expiration_date", "status", "occupancy_type", "sq_feet", "address", "zip",
+    "ward", "property_id", "parcel_id", "latitude", "longitude",
+    "created_at", "updated_at",
+)
+PERMIT_SELECT = ", ".join(PERMIT_FIELDS)
+
+# Full-text search: word characters only (keeps tsquery syntax out of
+# user input), capped so one request cannot build a huge query
+SEARCH_TERM_RE = re.compile(r"\w+")
+SEARCH_MAX_TERMS = 8
+# Relevance ordering ranks at most this many of the newest matches, so
+# broad terms don't rank half the table per page
+SEARCH_RANK_WINDOW = 1000
+
+# Server-side clustering grid: cells per 256px map tile, and the latitude
+# used to keep cells roughly square
+CLUSTER_CELLS_PER_TILE = 8
+BOSTON_LATITUDE = 42.33
+
+# GROUPING(day, zip, work_type) values for each grouping set in _query_stats
+# (a set bit means that column was aggregated away)
+ROLLUP_TOTAL = 0b111
+ROLLUP_BY_TYPE = 0b110
+ROLLUP_BY_ZIP = 0b101
+ROLLUP_BY_DAY = 0b011
+
+
+def _pack_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _unpack_cursor(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+
+def encode_cursor(issued_date: date, permit_id: int) -> str:
+    """Opaque keyset cursor pointing just past (issued_date, id)"""
+    return _pack_cursor([issued_date.isoformat(), permit_id])
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    """Inverse of encode_cursor - raises ValueError for malformed cursors"""
+    try:
+        issued, permit_id = _unpack_cursor(cursor)
+        return date.fromisoformat(issued), int(permit_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def encode_rank_cursor(rank: float, permit_id: int) -> str:
+    """Opaque keyset cursor pointing just past (search rank, id)"""
+    return _pack_cursor([rank, permit_id])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    """Inverse of encode_rank_cursor - raises ValueError for malformed cursors"""
+    try:
+        rank, permit_id = _unpack_cursor(cursor)
+        return float(rank), int(permit_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def parse_bbox(bbox: Optional[str]) -> Optional[tuple]:
+    """
+    Parse bbox=minLng,minLat,maxLng,maxLat into a float tuple.
+    Raises ValueError for malformed or inverted boxes.
+    """
+    if not bbox:
+        return None
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise ValueError("bbox must be minLng,minLat,maxLng,maxLat")
+    if min_lng > max_lng or min_lat > max_lat:
+        raise ValueError("bbox minimums must not exceed maximums")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def _permit_filters(
+    zip: Optional[str],
+    work_type: Optional[str],
+    days: int,
+    bbox: Optional[tuple] = None
+) -> tuple[str, list]:
+    """
+    WHERE clause and params shared by the permit listing and map queries.
+    The bbox condition matches the expression behind idx_permits_location,
+    so viewport queries are answered from the GiST index. A bbox around all
+    of Boston only excludes rows without coordinates, and is written that
+    way: the planner's fixed estimate for <@ would otherwise pick the GiST
+    index for a city-wide scan.
+    """
+    conditions = ["issued_date >= CURRENT_DATE - %s::int"]
+    params: list = [days]
+
+    if zip:
+        conditions.append("zip = %s")
+        params.append(zip)
+
+    if work_type:
+        conditions.append("work_type = %s")
+        params.append(work_type)
+
+    if bbox and bbox_contains_boston(*bbox):
+        conditions.append("latitude IS NOT NULL AND longitude IS NOT NULL")
+    elif bbox:
+        conditions.append(
+            "point(longitude::float8, latitude::float8) <@ box(point(%s, %s), point(%s, %s))"
+        )
+        params.extend(bbox)
+
+    return " AND ".join(conditions), params
+
+
+def _rollup_filters(zip: Optional[str], work_type: Optional[str], days: int, bbox: Optional[tuple]):
+    """Filters for a rollup-based estimate, or None when the rollup can't answer"""
+    if bbox:
+        return None
+    return {"days": days, "zip": zip, "work_type": work_type}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple]:
+    """
+    Parse a comma-separated fields= projection into permit columns.
+    work_type_label is accepted as a virtual field. Returns None for all
+    fields and raises ValueError for unknown names.
+    """
+    if not fields:
+        return None
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in PERMIT_FIELDS and f != "work_type_label"]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested or None
+
+
+def _permit_total(
+    cur,
+    mode: str,
+    where_clause: str,
+    params: list,
+    rollup_filters: Optional[dict] = None
+) -> tuple[Optional[int], Optional[str]]:
+    """
+    Count permits matching a listing's filters according to mode:
+    exact runs COUNT(*), estimate sums permit_daily_rollup when the filters
+    are ones it is keyed by (rollup_filters: days/zip/work_type) and falls
+    back to the planner's row estimate otherwise, none skips counting.
+    Returns (total, source) where source is count, rollup, planner or None.
+    """
+    if mode == "none":
+        return None, None
+
+    if mode == "exact":
+        cur.execute(f"/* permits.count */ SELECT COUNT(*) as count FROM permits WHERE {where_clause}", params)
+        return cur.fetchone()['count'], "count"
+
+    if rollup_filters is not None:
+        conditions = ["day >= CURRENT_DATE - %s::int"]
+        rollup_params = [rollup_filters["days"]]
+        for column in ("zip", "work_type"):
+            if rollup_filters.get(column):
+                conditions.append(f"{column} = %s")
+                rollup_params.append(rollup_filters[column])
+        cur.execute(f"""
+            /* permits.count_rollup */
+            SELECT COALESCE(SUM(permit_count), 0)::bigint AS count
+            FROM permit_daily_rollup
+            WHERE {" AND ".join(conditions)}
+        """, rollup_params)
+        return cur.fetchone()['count'], "rollup"
+
+    cur.execute(
+        f"/* permits.count_estimate */ EXPLAIN (FORMAT JSON) SELECT 1 FROM permits WHERE {where_clause}",
+        params
+    )
+    plan = cur.fetchone()['QUERY PLAN']
+    return int(plan[0]["Plan"]["Plan Rows"]), "planner"
+
+
+def _query_permits(
+    zip: Optional[str],
+    work_type: Optional[str],
+    days: int,
+    limit: int,
+    offset: int,
+    cursor: Optional[str] = None,
+    total_mode: str = "exact",
+    fields: Optional[tuple] = None,
+    bbox: Optional[tuple] = None
+) -> dict:
+    """
+    Filtered, paginated permit listing (runs on the DB executor).
+    Rows are ordered by (issued_date, id) descending so pages are stable.
+    With a cursor the page starts right after the cursor's row (keyset
+    pagination, constant cost at any depth); otherwise offset is used.
+    total_mode picks how the total is produced (see _permit_total) and
+    fields optionally restricts the returned columns (see parse_fields)
+    and bbox limits results to a viewport (see parse_bbox).
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    if fields:
+        # id and issued_date are always read to build next_cursor, and
+        # work_type to derive work_type_label
+        columns = [f for f in fields if f in PERMIT_FIELDS]
+        for required in ("id", "issued_date", "work_type"):
+            if required not in columns:
+                columns.append(required)
+        select_list = ", ".join(columns)
+    else:
+        select_list = PERMIT_SELECT
+
+    where_clause, params = _permit_filters(zip, work_type, days, bbox)
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # Get total count
+            total, total_source = _permit_total(
+                cur, total_mode, where_clause, params,
+                rollup_filters=_rollup_filters(zip, work_type, days, bbox)
+            )
+
+            # Get records
+            page_clause = where_clause
+            page_params = list(params)
+            if after:
+                page_clause += " AND (issued_date, id) < (%s, %s)"
+                page_params.extend(after)
+
+            query = f"""
+                /* permits.page */
+                SELECT {select_list} FROM permits
+                WHERE {page_clause}
+                ORDER BY issued_date DESC, id DESC
+                LIMIT %s OFFSET %s
+            """
+            cur.execute(query, page_params + [limit, 0 if after else offset])
+            permits = cur.fetchall()
+
+            # Add work type labels; dates and Decimals are left for
+            # FastJSONResponse to encode
+            for permit in permits:
+                permit['work_type_label'] = WORK_TYPE_LABELS.get(
+                    permit.get('work_type'),
+                    permit.get('work_type')
+                )
+            serialized_permits = [{f: p[f] for f in fields} for p in permits] if fields else permits
+
+            next_cursor = None
+            if len(permits) == limit:
+                last = permits[-1]
+                next_cursor = encode_cursor(last['issued_date'], last['id'])
+
+            return {
+                "data": serialized_permits,
+                "count": len(serialized_permits),
+                "total": total,
+                "total_mode": total_mode,
+                "total_source": total_source,
+                "limit": limit,
+                "offset": offset,
+                "next_cursor": next_cursor
+            }
+
 
 @app.get("/api/permits")
 async def get_permits(
@@ -95,81 +443,64 @@ async def get_permits(
     work_type: Optional[str] = Query(None, description="Filter by work type"),
     days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum results"),
-    offset: int = Query(0, ge=0, description="Offset for pagination")
+    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page's next_cursor"),
+    total: str = Query(
+        "exact",
+        pattern="^(exact|estimate|none)$",
+        description="How to compute total: exact COUNT, cheap estimate, or none"
+    ),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return (default: all)"),
+    bbox: Optional[str] = Query(None, description="Viewport filter: minLng,minLat,maxLng,maxLat")
 ):
-    """Get permits with optional filters and pagination"""
+    """
+    Get permits with optional filters and pagination.
+    Pass next_cursor back as cursor for stable, constant-cost paging;
+    offset still works for backward compatibility.
+    """
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Build WHERE clause
-                conditions = [f"issued_date >= CURRENT_DATE - INTERVAL '{days} days'"]
-                params = []
-
-                if zip:
-                    conditions.append("zip = %s")
-                    params.append(zip)
-
-                if work_type:
-                    conditions.append("work_type = %s")
-                    params.append(work_type)
-
-                where_clause = " AND ".join(conditions)
-
-                # Get total count
-                cur.execute(f"SELECT COUNT(*) as count FROM permits WHERE {where_clause}", params)
-                total = cur.fetchone()['count']
-
-                # Get records
-                query = f"""
-                    SELECT * FROM permits
-                    WHERE {where_clause}
-                    ORDER BY issued_date DESC
-                    LIMIT %s OFFSET %s
-                """
-                cur.execute(query, params + [limit, offset])
-                permits = cur.fetchall()
-
-                # Serialize and add work type labels
-                serialized_permits = []
-                for permit in permits:
-                    p = serialize_row(permit)
-                    p['work_type_label'] = WORK_TYPE_LABELS.get(
-                        permit.get('work_type'),
-                        permit.get('work_type')
-                    )
-                    serialized_permits.append(p)
-
-                return {
-                    "data": serialized_permits,
-                    "count": len(serialized_permits),
-                    "total": total,
-                    "limit": limit,
-                    "offset": offset
-                }
+        if cursor:
+            decode_cursor(cursor)
+        projection = parse_fields(fields)
+        viewport = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        result = await run_db(
+            _query_permits, zip, work_type, days, limit, offset, cursor, total, projection, viewport
+        )
+        return FastJSONResponse(result)
 
     except Exception as e:
         logger.error(f"Error fetching permits: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _query_permit(permit_number: str) -> dict:
+    """Single permit lookup (runs on the DB executor)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"/* permit.get */ SELECT {PERMIT_SELECT} FROM permits WHERE permit_number = %s", (permit_number,))
+            permit = cur.fetchone()
+
+            if not permit:
+                raise HTTPException(status_code=404, detail="Permit not found")
+
+            permit['work_type_label'] = WORK_TYPE_LABELS.get(
+                permit.get('work_type'),
+                permit.get('work_type')
+            )
+            return permit
+
+
 @app.get("/api/permits/{permit_number}")
 async def get_permit(permit_number: str):
     """Get a single permit by permit number"""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM permits WHERE permit_number = %s", (permit_number,))
-                permit = cur.fetchone()
-
-                if not permit:
-                    raise HTTPException(status_code=404, detail="Permit not found")
-
-                p = serialize_row(permit)
-                p['work_type_label'] = WORK_TYPE_LABELS.get(
-                    permit.get('work_type'),
-                    permit.get('work_type')
-                )
-                return p
+        return FastJSONResponse(await run_db(_query_permit, permit_number))
 
     except HTTPException:
         raise
@@ -178,100 +509,494 @@ async def get_permit(permit_number: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/stats")
-async def get_stats(days: int = Query(30, ge=1, le=365, description="Number of days to analyze")):
-    """Get permit statistics"""
-    try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Total permits
-                cur.execute(f"""
-                    SELECT COUNT(*) as count
-                    FROM permits
-                    WHERE issued_date >= CURRENT_DATE - INTERVAL '{days} days'
-                """)
-                total = cur.fetchone()['count']
+def parse_search_query(q: str) -> str:
+    """
+    Turn free text into a prefix-matching tsquery: every word must match
+    the start of a word in the document ("roof dec" finds "roof deck").
+    Raises ValueError when the text has no searchable words.
+    """
+    terms = SEARCH_TERM_RE.findall(q.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise ValueError("q must contain at least one word")
+    return " & ".join(f"{term}:*" for term in terms)
 
-                # By work type
-                cur.execute(f"""
-                    SELECT work_type, COUNT(*) as count
-                    FROM permits
-                    WHERE issued_date >= CURRENT_DATE - INTERVAL '{days} days'
-                    GROUP BY work_type
-                    ORDER BY count DESC
-                """)
-                by_type = [
-                    {
-                        "type": row['work_type'],
-                        "label": WORK_TYPE_LABELS.get(row['work_type'], row['work_type']),
-                        "count": row['count']
-                    }
-                    for row in cur.fetchall()
-                ]
-
-                # By ZIP code
-                cur.execute(f"""
-                    SELECT zip, COUNT(*) as count
-                    FROM permits
-                    WHERE issued_date >= CURRENT_DATE - INTERVAL '{days} days'
-                      AND zip IS NOT NULL
-                    GROUP BY zip
-                    ORDER BY count DESC
-                    LIMIT 15
-                """)
-                by_zip = [{"zip": row['zip'], "count": row['count']} for row in cur.fetchall()]
-
-                # By day (for charts)
+
+def _query_search(
+    tsquery: str,
+    zip: Optional[str],
+    work_type: Optional[str],
+    days: int,
+    limit: int,
+    sort: str = "relevance",
+    cursor: Optional[str] = None,
+    total_mode: str = "estimate"
+) -> dict:
+    """
+    Full-text permit search (runs on the DB executor).
+    Matches come from idx_permits_search and are ordered by ts_rank_cd
+    (relevance) or by issued_date (date), with a keyset cursor for each
+    order. Date order pages through every match. Relevance ranks the
+    newest SEARCH_RANK_WINDOW matches; when there are more, total counts
+    only those and truncated is set.
+    """
+    where_clause, params = _permit_filters(zip, work_type, days)
+    where_clause += " AND search_vector @@ to_tsquery('english', %s)"
+    params.append(tsquery)
+
+    if sort == "date":
+        order_by = "issued_date DESC, id DESC"
+        after_clause = "(issued_date, id) < (%s, %s)"
+        after = decode_cursor(cursor) if cursor else None
+    else:
+        order_by = "rank DESC, id DESC"
+        after_clause = "(rank, id) < (%s::real, %s)"
+        after = decode_rank_cursor(cursor) if cursor else None
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            total, total_source = _permit_total(cur, total_mode, where_clause, params)
+
+            if sort == "date":
                 cur.execute(f"""
-                    SELECT issued_date::date as day, COUNT(*) as count
+                    /* search.by_date */
+                    SELECT {PERMIT_SELECT},
+                        ts_rank_cd(search_vector, to_tsquery('english', %s)) AS rank
                     FROM permits
-                    WHERE issued_date >= CURRENT_DATE - INTERVAL '{days} days'
-                    GROUP BY issued_date::date
-                    ORDER BY day
-                """)
-                by_day = [
-                    {"date": row['day'].isoformat(), "count": row['count']}
-                    for row in cur.fetchall()
-                ]
-
-                # Total declared valuation
+                    WHERE {where_clause}{" AND " + after_clause if after else ""}
+                    ORDER BY {order_by}
+                    LIMIT %s
+                """, [tsquery] + params + list(after or ()) + [limit])
+            else:
+                # Only the newest SEARCH_RANK_WINDOW matches are ranked (an
+                # issued_date index walk), and the keyset on (rank, id) picks
+                # the page. candidates and position let the response say
+                # whether the window was full and whether more pages follow.
+                # Full rows are only read for the page that is returned.
                 cur.execute(f"""
-                    SELECT COALESCE(SUM(declared_valuation), 0) as total
-                    FROM permits
-                    WHERE issued_date >= CURRENT_DATE - INTERVAL '{days} days'
-                """)
-                total_valuation = float(cur.fetchone()['total'])
-
-                return {
-                    "period_days": days,
-                    "total_permits": total,
-                    "total_valuation": total_valuation,
-                    "by_type": by_type,
-                    "by_zip": by_zip,
-                    "by_day": by_day
-                }
+                    /* search.by_relevance */
+                    SELECT {PERMIT_SELECT}, page.rank, page.candidates, page.position
+                    FROM (
+                        SELECT id, rank, candidates, position FROM (
+                            SELECT id, rank,
+                                COUNT(*) OVER () AS candidates,
+                                ROW_NUMBER() OVER (ORDER BY {order_by}) AS position
+                            FROM (
+                                SELECT id, ts_rank_cd(search_vector, to_tsquery('english', %s)) AS rank
+                                FROM (
+                                    SELECT id, search_vector
+                                    FROM permits
+                                    WHERE {where_clause}
+                                    ORDER BY issued_date DESC, id DESC
+                                    LIMIT %s
+                                ) newest
+                            ) ranked
+                        ) matches
+                        {"WHERE " + after_clause if after else ""}
+                        ORDER BY {order_by}
+                        LIMIT %s
+                    ) page
+                    JOIN permits USING (id)
+                    ORDER BY page.rank DESC, id DESC
+                """, [tsquery] + params + [SEARCH_RANK_WINDOW] + list(after or ()) + [limit])
+            permits = cur.fetchall()
+
+    more = len(permits) == limit
+    truncated = False
+    if sort != "date" and permits:
+        for permit in permits:
+            candidates = permit.pop('candidates')
+            last_position = permit.pop('position')
+        # The last ranked candidate ends the results even on a full page
+        more = more and last_position < candidates
+        if candidates >= SEARCH_RANK_WINDOW:
+            # Older matches were left out of the ranking: report what can
+            # actually be paged through
+            truncated = True
+            total, total_source = candidates, "rank_window"
+
+    for permit in permits:
+        permit['work_type_label'] = WORK_TYPE_LABELS.get(
+            permit.get('work_type'),
+            permit.get('work_type')
+        )
+
+    next_cursor = None
+    if more:
+        last = permits[-1]
+        if sort == "date":
+            next_cursor = encode_cursor(last['issued_date'], last['id'])
+        else:
+            next_cursor = encode_rank_cursor(last['rank'], last['id'])
+
+    return {
+        "query": tsquery,
+        "sort": sort,
+        "data": permits,
+        "count": len(permits),
+        "total": total,
+        "total_mode": total_mode,
+        "total_source": total_source,
+        "limit": limit,
+        "truncated": truncated,
+        "next_cursor": next_cursor
+    }
+
+
+@app.get("/api/search")
+async def search_permits(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for (prefix match)"),
+    zip: Optional[str] = Query(None, alias="zip", description="Filter by ZIP code"),
+    work_type: Optional[str] = Query(None, description="Filter by work type"),
+    days: int = Query(3650, ge=1, le=3650, description="Number of days to look back"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum results"),
+    sort: str = Query("relevance", pattern="^(relevance|date)$", description="Order by relevance or issue date"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page's next_cursor"),
+    total: str = Query(
+        "estimate",
+        pattern="^(exact|estimate|none)$",
+        description="How to compute total: exact COUNT, planner estimate, or none"
+    )
+):
+    """
+    Search permit descriptions, addresses, applicants and comments.
+    Every word is prefix-matched; results combine with the usual filters.
+    """
+    try:
+        tsquery = parse_search_query(q)
+        if cursor:
+            decode_cursor(cursor) if sort == "date" else decode_rank_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        return FastJSONResponse(await run_db(
+            _query_search, tsquery, zip, work_type, days, limit, sort, cursor, total
+        ))
+
+    except Exception as e:
+        logger.error(f"Error searching permits: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def zip_columns(rows: list, width: int) -> list:
+    """Transpose row tuples into columns (empty columns for no rows)"""
+    return list(zip(*rows)) if rows else [()] * width
+
+
+def _query_map_points(
+    zip: Optional[str],
+    work_type: Optional[str],
+    days: int,
+    limit: int,
+    bbox: Optional[tuple] = None
+) -> dict:
+    """
+    Compact map points as columnar arrays (runs on the DB executor).
+    Work types are dictionary-encoded: work_type[i] indexes work_types.
+    """
+    where_clause, params = _permit_filters(zip, work_type, days, bbox)
+    where_clause += " AND latitude IS NOT NULL AND longitude IS NOT NULL"
+
+    with get_db_connection() as conn:
+        with conn.cursor(row_factory=tuple_row) as cur:
+            cur.execute(f"""
+                /* map.points */
+                SELECT permit_number, latitude::float8, longitude::float8, work_type
+                FROM permits
+                WHERE {where_clause}
+                ORDER BY issued_date DESC, id DESC
+                LIMIT %s
+            """, params + [limit])
+            rows = cur.fetchall()
+
+        if len(rows) < limit:
+            # Everything matched fits in this response - the total is exact
+            total, total_source = len(rows), "count"
+        else:
+            with conn.cursor() as cur:
+                total, total_source = _permit_total(
+                    cur, "estimate", where_clause, params,
+                    rollup_filters=_rollup_filters(zip, work_type, days, bbox)
+                )
+
+    ids, lats, lngs, types = (list(column) for column in zip_columns(rows, 4))
+    codes: dict = {}
+    type_index = [codes.setdefault(t, len(codes)) for t in types]
+
+    return {
+        "count": len(ids),
+        "total": total,
+        "total_source": total_source,
+        "ids": ids,
+        "lat": lats,
+        "lng": lngs,
+        "work_type": type_index,
+        "work_types": list(codes),
+        "work_type_labels": [WORK_TYPE_LABELS.get(t, t) for t in codes]
+    }
+
+
+@app.get("/api/map/points")
+async def get_map_points(
+    zip: Optional[str] = Query(None, alias="zip", description="Filter by ZIP code"),
+    work_type: Optional[str] = Query(None, description="Filter by work type"),
+    days: int = Query(30, ge=1, le=3650, description="Number of days to look back"),
+    limit: int = Query(5000, ge=1, le=50000, description="Maximum points"),
+    bbox: Optional[str] = Query(None, description="Viewport filter: minLng,minLat,maxLng,maxLat")
+):
+    """
+    Get map markers as compact columnar arrays (permit ids, lat, lng and
+    dictionary-encoded work types). Load full records lazily from
+    /api/permits/{permit_number}.
+    """
+    try:
+        viewport = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        return FastJSONResponse(await run_db(_query_map_points, zip, work_type, days, limit, viewport))
+
+    except Exception as e:
+        logger.error(f"Error fetching map points: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def cluster_cell_size(zoom: int) -> tuple[float, float]:
+    """
+    Grid cell size in degrees (lng, lat) for a map zoom level: about
+    CLUSTER_CELLS_PER_TILE cells across each 256px web map tile, with the
+    latitude step scaled so cells are roughly square at Boston's latitude.
+    """
+    lng_cell = 360.0 / (2 ** zoom * CLUSTER_CELLS_PER_TILE)
+    return lng_cell, lng_cell * math.cos(math.radians(BOSTON_LATITUDE))
+
+
+def _query_map_clusters(
+    zoom: int,
+    zip: Optional[str],
+    work_type: Optional[str],
+    days: int,
+    limit: int,
+    bbox: Optional[tuple] = None
+) -> dict:
+    """
+    Permits aggregated into grid cells for a zoom level (runs on the DB
+    executor). Each cluster carries its centroid, count, valuation sum and
+    most common work type. Only the `limit` largest clusters are returned;
+    total still counts every matching permit.
+    """
+    lng_cell, lat_cell = cluster_cell_size(zoom)
+    where_clause, params = _permit_filters(zip, work_type, days, bbox)
+
+    with get_db_connection() as conn:
+        with conn.cursor(row_factory=tuple_row) as cur:
+            cur.execute(f"""
+                /* map.clusters */
+                SELECT
+                    AVG(latitude::float8) AS lat,
+                    AVG(longitude::float8) AS lng,
+                    COUNT(*) AS count,
+                    COALESCE(SUM(declared_valuation), 0)::float8 AS valuation,
+                    mode() WITHIN GROUP (ORDER BY work_type) AS work_type,
+                    COUNT(*) OVER () AS clusters,
+                    SUM(COUNT(*)) OVER ()::bigint AS total
+                FROM permits
+                WHERE {where_clause}
+                  AND latitude IS NOT NULL AND longitude IS NOT NULL
+                GROUP BY
+                    floor(longitude::float8 / %s),
+                    floor(latitude::float8 / %s)
+                ORDER BY count DESC
+                LIMIT %s
+            """, params + [lng_cell, lat_cell, limit])
+            rows = cur.fetchall()
+
+    # Window totals are computed over every cell, before the LIMIT
+    total_clusters, total = (rows[0][5], rows[0][6]) if rows else (0, 0)
+
+    clusters = [
+        {
+            "lat": round(lat, 6),
+            "lng": round(lng, 6),
+            "count": count,
+            "valuation": valuation,
+            "work_type": dominant,
+            "work_type_label": WORK_TYPE_LABELS.get(dominant, dominant)
+        }
+        for lat, lng, count, valuation, dominant, _, _ in rows
+    ]
+    return {
+        "zoom": zoom,
+        "cell_size": {"lng": lng_cell, "lat": lat_cell},
+        "count": len(clusters),
+        "total": total,
+        "total_clusters": total_clusters,
+        "truncated": total_clusters > len(clusters),
+        "clusters": clusters
+    }
+
+
+@app.get("/api/map/clusters")
+async def get_map_clusters(
+    zoom: int = Query(..., ge=0, le=20, description="Map zoom level"),
+    zip: Optional[str] = Query(None, alias="zip", description="Filter by ZIP code"),
+    work_type: Optional[str] = Query(None, description="Filter by work type"),
+    days: int = Query(30, ge=1, le=3650, description="Number of days to look back"),
+    limit: int = Query(5000, ge=1, le=50000, description="Maximum clusters, largest first"),
+    bbox: Optional[str] = Query(None, description="Viewport filter: minLng,minLat,maxLng,maxLat")
+):
+    """
+    Get server-side clusters for a zoom level and viewport, so long time
+    ranges render as a few hundred aggregates instead of raw points.
+    At high zooms cells shrink toward single permits, so the response is
+    capped at `limit` clusters with `truncated` set when more matched.
+    """
+    try:
+        viewport = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        return FastJSONResponse(await run_db(_query_map_clusters, zoom, zip, work_type, days, limit, viewport))
+
+    except Exception as e:
+        logger.error(f"Error fetching map clusters: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _query_tile(z: int, x: int, y: int, days: int, generation: Optional[str]) -> bytes:
+    """Load a density tile (runs on the DB executor)"""
+    with get_db_connection() as conn:
+        if generation is None:
+            return build_tile(conn, z, x, y, days)
+        return get_tile(conn, generation, z, x, y, days)
+
+
+@app.get("/api/tiles/{z}/{x}/{y}")
+async def get_tile_endpoint(
+    z: int,
+    x: int,
+    y: int,
+    days: int = Query(settings.TILE_DEFAULT_DAYS, ge=1, le=3650, description="Number of days to look back")
+):
+    """
+    Get permit density aggregates for an XYZ map tile. Tiles for the
+    default window at low zooms are precomputed by the sync job.
+    """
+    try:
+        validate_tile(z, x, y)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not covers_boston(z, x, y):
+        # No stored coordinates can fall here: no query, nothing cached
+        return Response(content=empty_tile(z, x, y, days), media_type="application/json")
+
+    try:
+        generation = await sync_generation.current()
+        body = await run_db(_query_tile, z, x, y, days, generation)
+        return Response(content=body, media_type="application/json")
+
+    except Exception as e:
+        logger.error(f"Error fetching tile {z}/{x}/{y}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _query_stats(days: int) -> dict:
+    """
+    Permit statistics for the last N days (runs on the DB executor).
+    Answered from permit_daily_rollup in one grouping-sets query; the
+    grouping id tells the totals, by-type, by-zip and by-day rows apart.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                /* stats.rollup */
+                SELECT
+                    GROUPING(day, zip, work_type) AS grouping_id,
+                    day,
+                    zip,
+                    work_type,
+                    COALESCE(SUM(permit_count), 0)::bigint AS count,
+                    COALESCE(SUM(valuation_sum), 0) AS valuation
+                FROM permit_daily_rollup
+                WHERE day >= CURRENT_DATE - %s::int
+                GROUP BY GROUPING SETS ((), (work_type), (zip), (day))
+            """, (days,))
+            rows = cur.fetchall()
+
+    total = 0
+    total_valuation = 0.0
+    type_counts, zip_counts, day_counts = [], [], []
+    for row in rows:
+        grouping_id = row['grouping_id']
+        if grouping_id == ROLLUP_TOTAL:
+            total = row['count']
+            total_valuation = float(row['valuation'])
+        elif grouping_id == ROLLUP_BY_TYPE:
+            type_counts.append((row['work_type'] or None, row['count']))
+        elif grouping_id == ROLLUP_BY_ZIP:
+            # Rows without a ZIP are stored under ''
+            if row['zip']:
+                zip_counts.append((row['zip'], row['count']))
+        elif grouping_id == ROLLUP_BY_DAY:
+            day_counts.append((row['day'], row['count']))
+
+    type_counts.sort(key=lambda item: (-item[1], item[0] or ''))
+    zip_counts.sort(key=lambda item: (-item[1], item[0]))
+    day_counts.sort()
+
+    return {
+        "period_days": days,
+        "total_permits": total,
+        "total_valuation": total_valuation,
+        "by_type": [
+            {
+                "type": work_type,
+                "label": WORK_TYPE_LABELS.get(work_type, work_type),
+                "count": count
+            }
+            for work_type, count in type_counts
+        ],
+        "by_zip": [{"zip": zip_code, "count": count} for zip_code, count in zip_counts[:15]],
+        "by_day": [{"date": day.isoformat(), "count": count} for day, count in day_counts]
+    }
+
+
+@app.get("/api/stats")
+async def get_stats(days: int = Query(30, ge=1, le=3650, description="Number of days to analyze")):
+    """Get permit statistics"""
+    try:
+        return await run_db(_query_stats, days)
 
     except Exception as e:
         logger.error(f"Error fetching stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _query_neighborhoods() -> dict:
+    """ZIP codes with permit counts (runs on the DB executor)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                /* neighborhoods */
+                SELECT zip, COUNT(*) as count
+                FROM permits
+                WHERE zip IS NOT NULL
+                GROUP BY zip
+                ORDER BY zip
+            """)
+            zip_codes = cur.fetchall()
+
+            return {"data": [serialize_row(row) for row in zip_codes]}
+
+
 @app.get("/api/neighborhoods")
 async def get_neighborhoods():
     """Get list of all ZIP codes with permit counts"""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT zip, COUNT(*) as count
-                    FROM permits
-                    WHERE zip IS NOT NULL
-                    GROUP BY zip
-                    ORDER BY zip
-                """)
-                zip_codes = cur.fetchall()
-
-                return {"data": [serialize_row(row) for row in zip_codes]}
+        return await run_db(_query_neighborhoods)
 
     except Exception as e:
         logger.error(f"Error fetching neighborhoods: {e}")
@@ -289,67 +1014,72 @@ async def get_work_types():
     }
 
 
-@app.get("/api/health")
-async def health_check():
-    """
-    Health check endpoint for monitoring.
-    Returns healthy/degraded/unhealthy based on database and sync status.
-    """
-    try:
+def _check_health():
+    """Database and sync freshness check (runs on the DB executor)"""
+    with get_db_connection() as conn:
         # Check database connection
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
-
-            # Get last sync
-            last_sync = get_last_sync(conn)
-
-            if last_sync is None:
-                return JSONResponse(
-                    status_code=503,
-                    content={
-                        "status": "unhealthy",
-                        "database": "connected",
-                        "last_sync": None,
-                        "error": "No sync records found"
-                    }
-                )
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
 
-            # Calculate hours since last sync
-            if last_sync['completed_at']:
-                hours_since_sync = (
-                    datetime.now() - last_sync['completed_at']
-                ).total_seconds() / 3600
-            else:
-                hours_since_sync = None
+        # Get last sync
+        last_sync = get_last_sync(conn)
 
-            # Determine health status
-            if hours_since_sync and hours_since_sync > 36:
-                return {
-                    "status": "degraded",
+        if last_sync is None:
+            return JSONResponse(
+                status_code=503,
+                content={
+                    "status": "unhealthy",
                     "database": "connected",
-                    "last_sync": last_sync['completed_at'].isoformat() if last_sync['completed_at'] else None,
-                    "hours_since_sync": round(hours_since_sync, 1),
-                    "warning": "Last sync was more than 36 hours ago"
+                    "last_sync": None,
+                    "error": "No sync records found"
                 }
+            )
 
-            if last_sync['status'] == 'error':
-                return {
-                    "status": "degraded",
-                    "database": "connected",
-                    "last_sync": last_sync['completed_at'].isoformat() if last_sync['completed_at'] else None,
-                    "hours_since_sync": round(hours_since_sync, 1) if hours_since_sync else None,
-                    "warning": f"Last sync failed: {last_sync.get('error_message', 'Unknown error')}"
-                }
+        # Calculate hours since last sync
+        if last_sync['completed_at']:
+            hours_since_sync = (
+                datetime.now() - last_sync['completed_at']
+            ).total_seconds() / 3600
+        else:
+            hours_since_sync = None
 
+        # Determine health status
+        if hours_since_sync and hours_since_sync > 36:
             return {
-                "status": "healthy",
+                "status": "degraded",
+                "database": "connected",
+                "last_sync": last_sync['completed_at'].isoformat() if last_sync['completed_at'] else None,
+                "hours_since_sync": round(hours_since_sync, 1),
+                "warning": "Last sync was more than 36 hours ago"
+            }
+
+        if last_sync['status'] == 'error':
+            return {
+                "status": "degraded",
                 "database": "connected",
                 "last_sync": last_sync['completed_at'].isoformat() if last_sync['completed_at'] else None,
                 "hours_since_sync": round(hours_since_sync, 1) if hours_since_sync else None,
-                "records_synced": last_sync.get('records_inserted', 0) + last_sync.get('records_updated', 0)
+                "warning": f"Last sync failed: {last_sync.get('error_message', 'Unknown error')}"
             }
 
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "last_sync": last_sync['completed_at'].isoformat() if last_sync['completed_at'] else None,
+            "hours_since_sync": round(hours_since_sync, 1) if hours_since_sync else None,
+            "records_synced": last_sync.get('records_inserted', 0) + last_sync.get('records_updated', 0)
+        }
+
+
+@app.get("/api/health")
+async def health_check():
+    """
+    Health check endpoint for monitoring.
+    Returns healthy/degraded/unhealthy based on database and sync status.
+    """
+    try:
+        return await run_db(_check_health)
+
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return JSONResponse(
@@ -362,30 +1092,101 @@ async def health_check():
         )
 
 
+def _query_sync_status() -> dict:
+    """Most recent sync log entries (runs on the DB executor)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                /* sync_log.recent */
+                SELECT * FROM sync_log
+                ORDER BY started_at DESC
+                LIMIT 5
+            """)
+            logs = cur.fetchall()
+
+            return {"data": [serialize_row(row) for row in logs]}
+
+
 @app.get("/api/sync-status")
 async def get_sync_status():
     """Get recent sync log entries"""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT * FROM sync_log
-                    ORDER BY started_at DESC
-                    LIMIT 5
-                """)
-                logs = cur.fetchall()
-
-                return {"data": [serialize_row(row) for row in logs]}
+        return await run_db(_query_sync_status)
 
     except Exception as e:
         logger.error(f"Error fetching sync status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/pool-stats")
+async def pool_stats():
+    """Get database connection pool usage (in use, waiting, acquire latency)"""
+    return get_pool_stats()
+
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    """Get response cache usage (entries, bytes, hit ratio)"""
+    return response_cache.stats()
+
+
+@app.get("/api/query-stats")
+async def get_query_stats(
+    limit: int = Query(10, ge=1, le=100, description="Number of query names to return"),
+    sort: str = Query("max", pattern="^(max|total|mean|count)$", description="Rank by max, total or mean time, or count")
+):
+    """Get the slowest named SQL statements since process start"""
+    return {
+        "data": query_stats.top(limit, sort),
+        "slow_query_ms": settings.SLOW_QUERY_MS,
+    }
+
+
+def _query_sync_metrics() -> tuple:
+    """Latest and latest successful sync_log rows (runs on the DB executor)"""
+    with get_db_connection() as conn:
+        last = get_last_sync(conn)
+        with conn.cursor() as cur:
+            cur.execute("""
+                /* sync_log.last_success */
+                SELECT * FROM sync_log
+                WHERE status = 'success'
+                ORDER BY id DESC
+                LIMIT 1
+            """)
+            last_success = cur.fetchone()
+    return last, last_success
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus text exposition of request, database, cache and sync metrics"""
+    try:
+        last_sync, last_success = await run_db(_query_sync_metrics)
+    except Exception as e:
+        # Still expose the in-process metrics when the database is down
+        logger.error(f"Error fetching sync metrics: {e}")
+        last_sync = last_success = None
+
+    body = metrics.render(
+        metrics.pool_metrics(get_pool_stats()),
+        metrics.cache_metrics({
+            "response": response_cache.stats(),
+            **{f"tile_{store}": stats for store, stats in get_tile_cache_stats().items()},
+        }),
+        metrics.sync_metrics(last_sync, last_success),
+    )
+    return Response(body, media_type=metrics.CONTENT_TYPE)
+
+
 # Serve static files (frontend) - mount after API routes
 frontend_path = Path(__file__).parent.parent / "frontend"
 if frontend_path.exists():
-    app.mount("/", StaticFiles(directory=str(frontend_path), html=True), name="frontend")
+    app.mount(
+        "/",
+        CachedStaticFiles(directory=str(frontend_path), html=True, max_age=settings.STATIC_MAX_AGE),
+        name="frontend"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,300 @@
+"""
+Boston Data Dashboard - Metrics
+In-process counters and histograms, rendered with scrape-time gauges in
+the Prometheus text exposition format for /metrics
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import threading
+import time
+
+from starlette.routing import Match
+
+# Starlette appends "; charset=utf-8" to text/* media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; spans cache hits (~1 ms) to the slowest cluster queries
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named metric family with fixed label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in values
+        ]
+
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count of observations per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+
+        lines = self.header()
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(round(total, 6))}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def family(
+    name: str,
+    kind: str,
+    documentation: str,
+    samples: Iterable[Tuple[Dict[str, object], Optional[float]]]
+) -> List[str]:
+    """Lines for a metric whose values are read at scrape time"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if value is not None:
+            lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+    return lines
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+HTTP_ERRORS = Counter(
+    "http_request_errors_total", "HTTP requests answered with a 5xx status", ("method", "route")
+)
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "Time from request to last response byte", ("method", "route")
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Time in each named database call, including connection acquire", ("query",)
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds", "Time executing each named SQL statement", ("query",)
+)
+
+REGISTRY: List[Metric] = [HTTP_REQUESTS, HTTP_ERRORS, HTTP_DURATION, DB_QUERY_DURATION, DB_STATEMENT_DURATION]
+
+
+def pool_metrics(stats: Dict) -> List[str]:
+    if stats.get("status") != "open":
+        return family("db_pool_open", "gauge", "Whether the connection pool is open", [({}, 0)])
+    return (
+        family("db_pool_open", "gauge", "Whether the connection pool is open", [({}, 1)])
+        + family("db_pool_connections", "gauge", "Pooled connections by state", [
+            ({"state": "in_use"}, stats["in_use"]),
+            ({"state": "available"}, stats["available"]),
+        ])
+        + family("db_pool_max_connections", "gauge", "Pool size limit", [({}, stats["max_size"])])
+        + family("db_pool_waiting", "gauge", "Requests waiting for a connection", [({}, stats["waiting"])])
+        + family("db_pool_acquires_total", "counter", "Connections handed out", [({}, stats["acquire_count"])])
+        + family("db_pool_acquire_max_seconds", "gauge", "Longest wait for a connection", [
+            ({}, stats["acquire_max_ms"] / 1000),
+        ])
+        + family("db_pool_connections_lost_total", "counter", "Connections found broken", [
+            ({}, stats["connections_lost"]),
+        ])
+    )
+
+
+def cache_metrics(caches: Dict[str, Dict]) -> List[str]:
+    """Hit/miss counters and hit ratio for each named cache's stats()"""
+    return (
+        family("cache_hits_total", "counter", "Cache lookups answered from the cache", [
+            ({"cache": name}, stats["hits"]) for name, stats in caches.items()
+        ])
+        + family("cache_misses_total", "counter", "Cache lookups that had to compute a value", [
+            ({"cache": name}, stats["misses"]) for name, stats in caches.items()
+        ])
+        + family("cache_hit_ratio", "gauge", "Hits over lookups since process start", [
+            ({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()
+        ])
+        + family("cache_entries", "gauge", "Entries held in memory", [
+            ({"cache": name}, stats.get("entries")) for name, stats in caches.items()
+        ])
+        + family("cache_bytes", "gauge", "Bytes held in memory", [
+            ({"cache": name}, stats.get("bytes")) for name, stats in caches.items()
+        ])
+    )
+
+
+def sync_metrics(last: Optional[Dict], last_success: Optional[Dict]) -> List[str]:
+    """Gauges describing the latest sync_log rows"""
+    lines = family("sync_last_success_timestamp_seconds", "gauge", "Completion time of the last successful sync", [
+        ({}, last_success["completed_at"].timestamp() if last_success and last_success["completed_at"] else None),
+    ])
+    if not last:
+        return lines
+
+    duration = last.get("duration_seconds")
+    if duration is None and last["completed_at"] and last["started_at"]:
+        duration = (last["completed_at"] - last["started_at"]).total_seconds()
+    return (
+        lines
+        + family("sync_last_run_timestamp_seconds", "gauge", "Start time of the latest sync", [
+            ({}, last["started_at"].timestamp() if last["started_at"] else None),
+        ])
+        + family("sync_last_status", "gauge", "1 for the status of the latest sync", [
+            ({"status": last["status"]}, 1),
+        ])
+        + family("sync_last_duration_seconds", "gauge", "Wall time of the latest completed sync", [
+            ({}, duration),
+        ])
+        + family("sync_last_records", "gauge", "Records processed by the latest sync", [
+            ({"outcome": outcome}, last.get(f"records_{outcome}"))
+            for outcome in ("fetched", "inserted", "updated", "unchanged", "quarantined")
+        ])
+        + family("sync_last_records_per_second", "gauge", "Records fetched per second of the latest sync", [
+            ({}, last.get("records_per_second")),
+        ])
+        + family("sync_last_pages_fetched", "gauge", "CKAN pages fetched by the latest sync", [
+            ({}, last.get("pages_fetched")),
+        ])
+        + family("sync_last_bytes_downloaded", "gauge", "CKAN response bytes of the latest sync", [
+            ({}, last.get("bytes_downloaded")),
+        ])
+        + family("sync_last_peak_rss_bytes", "gauge", "Peak resident memory of the latest sync", [
+            ({}, last.get("peak_rss_bytes")),
+        ])
+        + family("sync_last_phase_seconds", "gauge", "Busy seconds per phase of the latest sync", [
+            ({"phase": phase}, seconds) for phase, seconds in sorted((last.get("phase_seconds") or {}).items())
+        ])
+    )
+
+
+def render(*extra: List[str]) -> bytes:
+    """The registry plus scrape-time families, in text exposition format"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    for group in extra:
+        lines.extend(group)
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them per route template
+    (so /api/permits/{permit_number} is one series, not one per permit).
+    Sits outside the response cache so hits are counted too; those never
+    reach the router, so their route is matched here instead.
+    """
+
+    # Bound on remembered path -> route matches (tile paths are unbounded)
+    MAX_MATCHED_PATHS = 1024
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+        self._matched: Dict[str, str] = {}
+
+    def _route(self, scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return getattr(route, "path", "") or "/"
+
+        path = scope["path"]
+        label = self._matched.get(path)
+        if label is None:
+            label = "unmatched"
+            for candidate in self.router.routes:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    label = getattr(candidate, "path", "") or "/"
+                    break
+            if len(self._matched) >= self.MAX_MATCHED_PATHS:
+                self._matched.clear()
+            self._matched[path] = label
+        return label
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def recording_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            method = scope["method"]
+            route = self._route(scope)
+            HTTP_DURATION.observe(time.perf_counter() - start, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status))
+            if status >= 500:
+                HTTP_ERRORS.inc(method, route)
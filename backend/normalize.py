@@ -0,0 +1,199 @@
+"""
+Boston Data Dashboard - Record Normalization
+Converts raw CKAN permit records into typed rows for the permits table
+"""
+
+from datetime import date, datetime
+import hashlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Permit columns populated from CKAN records, in insert order
+PERMIT_DATA_COLUMNS = (
+    "permit_number", "work_type", "permit_type_descr", "description", "comments",
+    "applicant", "declared_valuation", "total_fees", "issued_date", "expiration_date",
+    "status", "occupancy_type", "sq_feet", "address", "zip",
+    "ward", "property_id", "parcel_id", "latitude", "longitude",
+)
+
+# Columns written by the loaders: the data columns plus their content hash
+PERMIT_COLUMNS = PERMIT_DATA_COLUMNS + ("content_hash",)
+
+# CKAN field name for each text column
+CKAN_TEXT_FIELDS = {
+    "permit_number": "permitnumber",
+    "work_type": "worktype",
+    "permit_type_descr": "permittypedescr",
+    "description": "description",
+    "comments": "comments",
+    "applicant": "applicant",
+    "status": "status",
+    "occupancy_type": "occupancytype",
+    "address": "address",
+    "zip": "zip",
+    "ward": "ward",
+    "property_id": "property_id",
+    "parcel_id": "parcel_id",
+}
+
+# VARCHAR limits from the permits schema
+COLUMN_MAX_LENGTHS = {
+    "permit_number": 50,
+    "work_type": 50,
+    "permit_type_descr": 255,
+    "applicant": 255,
+    "status": 50,
+    "occupancy_type": 100,
+    "address": 255,
+    "zip": 10,
+    "ward": 10,
+    "property_id": 50,
+    "parcel_id": 50,
+}
+
+# Largest absolute values that fit DECIMAL(15,2), DECIMAL(10,2) and INTEGER
+MAX_VALUATION = 10 ** 13
+MAX_FEES = 10 ** 8
+MAX_SQ_FEET = 2 ** 31 - 1
+
+# Boston bounding box used to validate coordinates
+BOSTON_LAT_RANGE = (42.2, 42.4)
+BOSTON_LNG_RANGE = (-71.2, -70.9)
+
+
+def parse_money(value) -> Optional[float]:
+    """Parse a currency string like '$1,250.00' - returns None if unparseable"""
+    if not value:
+        return None
+    try:
+        money_str = str(value).replace('$', '').replace(',', '')
+        return float(money_str) if money_str else None
+    except (ValueError, AttributeError):
+        return None
+
+
+def parse_sq_feet(value) -> Optional[int]:
+    """Parse square footage, truncating decimals - returns None if unparseable"""
+    if not value:
+        return None
+    try:
+        return int(float(value))
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def parse_coordinates(record: Dict) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Parse coordinates from API field names (y_latitude, x_longitude).
+    Returns (None, None) unless both parse and fall inside Boston.
+    """
+    if not (record.get('y_latitude') and record.get('x_longitude')):
+        return None, None
+    try:
+        lat = float(record['y_latitude'])
+        lng = float(record['x_longitude'])
+    except (ValueError, TypeError):
+        return None, None
+    if (BOSTON_LAT_RANGE[0] <= lat <= BOSTON_LAT_RANGE[1]
+            and BOSTON_LNG_RANGE[0] <= lng <= BOSTON_LNG_RANGE[1]):
+        return lat, lng
+    return None, None
+
+
+def bbox_contains_boston(min_lng: float, min_lat: float, max_lng: float, max_lat: float) -> bool:
+    """
+    True if the box contains the whole Boston bounding box, in which case
+    it matches every stored coordinate (parse_coordinates keeps no others)
+    """
+    return (min_lng <= BOSTON_LNG_RANGE[0] and max_lng >= BOSTON_LNG_RANGE[1]
+            and min_lat <= BOSTON_LAT_RANGE[0] and max_lat >= BOSTON_LAT_RANGE[1])
+
+
+def parse_date(value, field: str) -> Optional[date]:
+    """
+    Parse a CKAN timestamp ('2024-01-15 00:00:00' or ISO 8601) to a date.
+    Raises ValueError for values Postgres would reject.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).strip()).date()
+    except ValueError:
+        raise ValueError(f"invalid {field}: {value!r}")
+
+
+def content_hash(values: tuple) -> str:
+    """
+    MD5 hex digest of normalized permit values, used to skip rewriting
+    rows whose content has not changed. NUL never appears in stored text,
+    so it safely marks NULL apart from the empty string.
+    """
+    canonical = "\x1f".join("\x00" if v is None else str(v) for v in values)
+    return hashlib.md5(canonical.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+def normalize_permit(record: Dict) -> tuple:
+    """
+    Convert a CKAN record into a row of values ordered like PERMIT_COLUMNS,
+    ending with the content hash of the normalized data.
+    Unparseable numbers and out-of-bounds coordinates become NULL, matching
+    the API's loose formatting. Raises ValueError for rows that cannot be
+    stored at all (missing permit number, bad dates, oversized values).
+    """
+    values = {}
+    for column, field in CKAN_TEXT_FIELDS.items():
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            value = str(value)
+        if value is not None:
+            if '\x00' in value:
+                raise ValueError(f"{column} contains a NUL byte")
+            max_length = COLUMN_MAX_LENGTHS.get(column)
+            if max_length and len(value) > max_length:
+                raise ValueError(f"{column} longer than {max_length} characters")
+        values[column] = value
+
+    if not values["permit_number"]:
+        raise ValueError("missing permit number")
+
+    valuation = parse_money(record.get('declared_valuation'))
+    if valuation is not None and abs(valuation) >= MAX_VALUATION:
+        raise ValueError(f"declared_valuation out of range: {valuation}")
+
+    fees = parse_money(record.get('total_fees'))
+    if fees is not None and abs(fees) >= MAX_FEES:
+        raise ValueError(f"total_fees out of range: {fees}")
+
+    sq_feet = parse_sq_feet(record.get('sq_feet'))
+    if sq_feet is not None and abs(sq_feet) > MAX_SQ_FEET:
+        raise ValueError(f"sq_feet out of range: {sq_feet}")
+
+    latitude, longitude = parse_coordinates(record)
+
+    values["declared_valuation"] = valuation
+    values["total_fees"] = fees
+    values["issued_date"] = parse_date(record.get('issued_date'), "issued_date")
+    values["expiration_date"] = parse_date(record.get('expiration_date'), "expiration_date")
+    values["sq_feet"] = sq_feet
+    values["latitude"] = latitude
+    values["longitude"] = longitude
+
+    row = tuple(values[column] for column in PERMIT_DATA_COLUMNS)
+    return row + (content_hash(row),)
+
+
+class PermitBatch(NamedTuple):
+    """
+    A normalized page: rows ordered like PERMIT_COLUMNS, one per permit
+    number, and (record, reason) pairs for the records that failed, in
+    page order
+    """
+    rows: List[tuple]
+    rejected: List[Tuple[Dict, str]]
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
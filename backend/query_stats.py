@@ -0,0 +1,193 @@
+"""
+Boston Data Dashboard - Query Statistics
+Per-statement timing by query name, with a slow-query log
+"""
+
+from typing import Dict, List, Optional
+import logging
+import re
+import sys
+import threading
+import time
+
+import psycopg
+from psycopg.rows import tuple_row
+
+from .config import settings
+from .metrics import DB_STATEMENT_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Longest parameter list written to the slow-query log
+MAX_LOGGED_PARAMS = 500
+
+# Data-modifying statements inside a WITH, e.g. the sync's /* load.merge */
+_MODIFYING_RE = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+def query_tag(query) -> Optional[str]:
+    """
+    Name from a leading /* name */ comment, e.g. /* permits.page */.
+    The tag also shows up in pg_stat_activity and server logs.
+    """
+    if not isinstance(query, str):
+        query = str(query)
+    text = query.lstrip()
+    if text.startswith("/*"):
+        end = text.find("*/")
+        if end != -1:
+            return text[2:end].strip()
+    return None
+
+
+def strip_tag(query: str) -> str:
+    """Statement text without its leading /* name */ comment"""
+    text = query.lstrip()
+    if text.startswith("/*"):
+        end = text.find("*/")
+        if end != -1:
+            return text[end + 2:].lstrip()
+    return text
+
+
+class QueryStats:
+    """Count, time and rows per query name since process start"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def record(self, name: str, elapsed_ms: float, rows: int, error: bool = False):
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = {
+                    "count": 0, "errors": 0, "slow": 0, "rows": 0,
+                    "total_ms": 0.0, "max_ms": 0.0,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            if elapsed_ms > entry["max_ms"]:
+                entry["max_ms"] = elapsed_ms
+            if rows > 0:
+                entry["rows"] += rows
+            if error:
+                entry["errors"] += 1
+            if settings.SLOW_QUERY_MS > 0 and elapsed_ms >= settings.SLOW_QUERY_MS:
+                entry["slow"] += 1
+
+    def top(self, limit: int = 10, sort: str = "max") -> List[Dict]:
+        """The `limit` query names with the highest max, total, mean or count"""
+        with self._lock:
+            rows = [
+                {
+                    "query": name,
+                    "count": entry["count"],
+                    "errors": entry["errors"],
+                    "slow": entry["slow"],
+                    "rows": entry["rows"],
+                    "total_ms": round(entry["total_ms"], 3),
+                    "mean_ms": round(entry["total_ms"] / entry["count"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                }
+                for name, entry in self._stats.items()
+            ]
+        key = {"max": "max_ms", "total": "total_ms", "mean": "mean_ms", "count": "count"}[sort]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStats()
+
+# Query name -> monotonic time its plan was last logged
+_explained_at: Dict[str, float] = {}
+_explained_lock = threading.Lock()
+
+
+def _should_explain(name: str, query: str) -> bool:
+    if not settings.SLOW_QUERY_EXPLAIN:
+        return False
+    text = strip_tag(query)
+    if not text.upper().startswith(("SELECT", "WITH")):
+        return False
+    if text.upper().startswith("WITH") and _MODIFYING_RE.search(text):
+        return False
+    now = time.monotonic()
+    with _explained_lock:
+        last = _explained_at.get(name)
+        if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+            return False
+        _explained_at[name] = now
+    return True
+
+
+def _explain(connection, query: str, params) -> str:
+    """Estimated plan (no ANALYZE, so nothing is run twice) as text"""
+    if connection.info.transaction_status == psycopg.pq.TransactionStatus.INERROR:
+        return "(transaction aborted)"
+    try:
+        # A savepoint, so a failed EXPLAIN rolls back to it instead of
+        # aborting the caller's transaction. A plain cursor: the caller's
+        # result set stays intact and the EXPLAIN itself is not timed.
+        with connection.transaction():
+            with psycopg.Cursor(connection, row_factory=tuple_row) as cur:
+                cur.execute(f"EXPLAIN {strip_tag(query)}", params)
+                return "\n".join(row[0] for row in cur.fetchall())
+    except psycopg.Error as e:
+        return f"(plan unavailable: {e})"
+
+
+def _log_slow_query(connection, name: str, query, params, elapsed_ms: float, rows: int):
+    text = query if isinstance(query, str) else str(query)
+    shown = repr(params)
+    if len(shown) > MAX_LOGGED_PARAMS:
+        shown = shown[:MAX_LOGGED_PARAMS] + "..."
+    message = f"Slow query {name}: {elapsed_ms:.1f} ms, {rows} rows, params={shown}"
+    if _should_explain(name, text):
+        message += "\n" + _explain(connection, text, params)
+    logger.warning(message)
+
+
+class InstrumentedCursor(psycopg.Cursor):
+    """
+    Cursor timing every execute() under a query name: the statement's
+    /* name */ tag, or the calling function's name when untagged. Durations
+    and row counts feed query_stats and db_statement_duration_seconds;
+    statements slower than SLOW_QUERY_MS are logged with their params and
+    estimated plan.
+    """
+
+    def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = super().execute(query, params, **kwargs)
+            error = False
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            name = query_tag(query) or sys._getframe(1).f_code.co_name
+            self._record(name, query, params, elapsed_ms, error)
+
+    def executemany(self, query, params_seq, **kwargs):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = super().executemany(query, params_seq, **kwargs)
+            error = False
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            name = query_tag(query) or sys._getframe(1).f_code.co_name
+            self._record(name, query, None, elapsed_ms, error)
+
+    def _record(self, name: str, query, params, elapsed_ms: float, error: bool):
+        rows = self.rowcount if not error else -1
+        query_stats.record(name, elapsed_ms, rows, error)
+        DB_STATEMENT_DURATION.observe(elapsed_ms / 1000, name)
+        if not error and 0 < settings.SLOW_QUERY_MS <= elapsed_ms:
+            _log_slow_query(self.connection, name, query, params, elapsed_ms, rows)
@@ -0,0 +1,51 @@
+"""
+Boston Data Dashboard - JSON Serialization
+Fast JSON encoding for API responses, using orjson when it is installed
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    # orjson not installed, fall back to the standard library encoder
+    orjson = None
+
+
+def _default(value):
+    """Encode the types psycopg returns that JSON has no native form for"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content as compact UTF-8 JSON. Dates, datetimes and Decimals
+    are encoded directly, so database rows need no per-row conversion.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps(). Returning one from a route also
+    skips FastAPI's jsonable_encoder pass over the content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
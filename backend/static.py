@@ -0,0 +1,67 @@
+"""
+Boston Data Dashboard - Static Files
+Serves the frontend with content-hash ETags and long-lived cache headers
+"""
+
+from typing import Dict, Tuple
+import hashlib
+import os
+import threading
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse, Response
+
+# Cache-Control for fingerprinted URLs (?v=<hash>): their content never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with strong ETags derived from file content instead of
+    mtime and size, so redeploys of an unchanged file still revalidate
+    with 304. HTML is always revalidated (no-cache) so a deploy is picked
+    up immediately; other assets are cached for max_age seconds, or for
+    a year when requested with a ?v= fingerprint.
+    """
+
+    def __init__(self, *args, max_age: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_age = max_age
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def content_etag(self, full_path: str, stat_result: os.stat_result) -> str:
+        """sha256-based ETag, recomputed only when mtime or size changes"""
+        with self._lock:
+            cached = self._hashes.get(full_path)
+        if cached and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b""):
+                digest.update(chunk)
+        etag = '"' + digest.hexdigest()[:32] + '"'
+        with self._lock:
+            self._hashes[full_path] = (stat_result.st_mtime_ns, stat_result.st_size, etag)
+        return etag
+
+    def cache_control(self, full_path: str, scope) -> str:
+        if str(full_path).endswith((".html", ".htm")):
+            return "no-cache"
+        if "v" in QueryParams(scope.get("query_string", b"")):
+            return IMMUTABLE_CACHE_CONTROL
+        return f"public, max-age={self.max_age}"
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["etag"] = self.content_etag(str(full_path), stat_result)
+        response.headers["cache-control"] = self.cache_control(full_path, scope)
+
+        if status_code == 200 and self.is_not_modified(response.headers, Headers(scope=scope)):
+            return Response(status_code=304, headers={
+                "etag": response.headers["etag"],
+                "cache-control": response.headers["cache-control"],
+            })
+        return response
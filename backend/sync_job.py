@@ -4,17 +4,46 @@ Fetches recent permits from Analyze Boston CKAN API and updates PostgreSQL datab
 """
 
 import requests
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing, contextmanager, nullcontext
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import multiprocessing
+import os
+import queue
 import sys
+import threading
+import time
 import logging
 
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then not recorded
+    resource = None
+
 from .config import settings
+from .cache import format_generation
+from .tiles import precompute_tiles
 from .database import (
     get_db_connection,
     init_db,
-    upsert_permit,
+    close_pool,
+    normalize_records,
+    load_permit_rows,
+    refresh_daily_rollup,
     create_sync_log,
-    update_sync_log
+    update_sync_log,
+    record_sync_performance,
+    get_checkpoints,
+    get_sync_generation,
+    plan_checkpoints,
+    advance_checkpoint,
+    complete_checkpoint,
+    reset_checkpoints,
+    sync_lock
 )
 
 # Configure logging
@@ -25,45 +54,175 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def fetch_permits_from_ckan(days: int = 90, limit: int = 10000, offset: int = 0) -> list:
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SyncStats:
+    """
+    Performance of one sync run: seconds spent in each phase, pages and
+    bytes fetched from CKAN. Fetch, decode and normalize run on the
+    prefetch threads while pages load, so phase times are busy time and
+    may add up to more than the run's wall time.
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phase_seconds: Dict[str, float] = {}
+        self.pages = 0
+        self.bytes = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase_time(name, time.perf_counter() - start)
+
+    def add_phase_time(self, name: str, seconds: float):
+        with self._lock:
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+
+    def add_page(self, size: int):
+        with self._lock:
+            self.pages += 1
+            self.bytes += size
+
+    def summary(self, records: int) -> Dict:
+        """Totals for sync_log (see database.record_sync_performance)"""
+        duration = time.perf_counter() - self._started
+        with self._lock:
+            phases = {name: round(seconds, 3) for name, seconds in self.phase_seconds.items()}
+            pages, size = self.pages, self.bytes
+        return {
+            "duration_seconds": round(duration, 3),
+            "records_per_second": round(records / duration, 1) if duration else None,
+            "pages_fetched": pages,
+            "bytes_downloaded": size,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "phase_seconds": phases,
+        }
+
+
+def _phase(stats: Optional[SyncStats], name: str):
+    return stats.phase(name) if stats else nullcontext()
+
+
+# A record's position in the sync order (issued_date DESC, _id): its raw
+# CKAN issued_date and datastore row id
+PageKey = Tuple[str, int]
+
+
+# Larger than any datastore _id: (date, MAX_ROW_ID) sorts after all of a date
+MAX_ROW_ID = 2 ** 63 - 1
+
+
+def record_key(record: dict) -> PageKey:
+    return str(record["issued_date"]), int(record["_id"])
+
+
+def page_key(page: list) -> PageKey:
+    """Key of the last record in a page, where the next page starts"""
+    return record_key(page[-1])
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _keyset_condition(after: Optional[PageKey] = None, before: Optional[PageKey] = None) -> str:
+    """
+    ' AND ...' limiting a query to records after `after` and before
+    `before` in the issued_date DESC, _id order
+    """
+    conditions = ""
+    if after is not None:
+        issued, row_id = _sql_literal(after[0]), int(after[1])
+        conditions += f''' AND ("issued_date" < {issued} OR ("issued_date" = {issued} AND "_id" > {row_id}))'''
+    if before is not None:
+        issued, row_id = _sql_literal(before[0]), int(before[1])
+        conditions += f''' AND ("issued_date" > {issued} OR ("issued_date" = {issued} AND "_id" < {row_id}))'''
+    return conditions
+
+
+def fetch_permits_from_ckan(
+    days: int = 90,
+    limit: int = 10000,
+    offset: int = 0,
+    session: Optional[requests.Session] = None,
+    stats: Optional[SyncStats] = None,
+    after: Optional[PageKey] = None,
+    before: Optional[PageKey] = None
+) -> list:
     """
     Fetch permits from Analyze Boston CKAN API.
     Uses SQL endpoint for date filtering with pagination support.
+    Results are ordered by issue date with the datastore row id as a
+    tiebreaker so consecutive pages neither overlap nor skip rows.
 
     Args:
         days: Number of days back to fetch
         limit: Max records per request (CKAN max is 32000)
         offset: Starting record for pagination
+        session: Optional requests session to reuse connections across pages
+        stats: Optional SyncStats to charge fetch and decode time and bytes to
+        after: Only records after this (issued_date, _id) key (keyset paging)
+        before: Only records before this key, i.e. newer than it
     """
     cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
 
     sql = f'''
         SELECT * FROM "{settings.CKAN_RESOURCE_ID}"
-        WHERE "issued_date" >= '{cutoff_date}'
-        ORDER BY "issued_date" DESC
+        WHERE "issued_date" >= '{cutoff_date}'{_keyset_condition(after, before)}
+        ORDER BY "issued_date" DESC, "_id"
         LIMIT {limit} OFFSET {offset}
     '''
 
-    logger.info(f"Fetching permits issued since {cutoff_date} (last {days} days) - offset {offset}")
+    position = f"after {after}" if after else f"offset {offset}"
+    logger.info(f"Fetching permits issued since {cutoff_date} (last {days} days) - {position}")
+
+    records = query_ckan(sql, session=session, stats=stats)
+    logger.info(f"Successfully fetched {len(records)} permits from API")
+    return records
 
+
+def query_ckan(
+    sql: str,
+    session: Optional[requests.Session] = None,
+    stats: Optional[SyncStats] = None
+) -> list:
+    """
+    Run a datastore_search_sql query and return its records.
+    Charges request and JSON decode time and response bytes to stats.
+    """
     try:
-        response = requests.get(
-            settings.CKAN_SQL_API_URL,
-            params={"sql": sql},
-            timeout=120
-        )
-        response.raise_for_status()
+        with _phase(stats, "fetch"):
+            response = (session or requests).get(
+                settings.CKAN_SQL_API_URL,
+                params={"sql": sql},
+                timeout=120
+            )
+            response.raise_for_status()
+            body = response.content
 
-        result = response.json()
+        with _phase(stats, "decode"):
+            result = response.json()
+        if stats:
+            stats.add_page(len(body))
 
         if not result.get("success"):
             error = result.get("error", {})
             error_msg = error.get("message", "Unknown API error")
             raise Exception(f"CKAN API error: {error_msg}")
 
-        records = result["result"]["records"]
-        logger.info(f"Successfully fetched {len(records)} permits from API")
-        return records
+        return result["result"]["records"]
 
     except requests.exceptions.Timeout:
         logger.error("Request to CKAN API timed out")
@@ -76,10 +235,61 @@ def fetch_permits_from_ckan(days: int = 90, limit: int = 10000, offset: int = 0)
         raise
 
 
+def iter_permit_pages(
+    days: int = 90,
+    page_size: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    stats: Optional[SyncStats] = None,
+    after: Optional[PageKey] = None,
+    before: Optional[PageKey] = None
+) -> Iterator[list]:
+    """
+    Yield pages of permit records for a date range until the API runs dry.
+    Only one page is held at a time, so memory does not grow with the range.
+    Pages are fetched by keyset (each starts after the previous page's
+    last key), so permits published mid-run can't shift rows past a page
+    boundary the way OFFSET paging would.
+
+    Args:
+        days: Number of days back to fetch
+        page_size: Records per API call (defaults to CKAN_PAGE_SIZE, max 32000)
+        session: Optional requests session to reuse connections across pages
+        stats: Optional SyncStats passed on to fetch_permits_from_ckan
+        after: Start after this key, e.g. a checkpoint's high-water mark
+        before: Only records before (newer than) this key
+    """
+    if page_size is None:
+        page_size = settings.CKAN_PAGE_SIZE
+
+    first = True
+    while True:
+        if not first and settings.CKAN_REQUEST_DELAY:
+            # Optional pause between requests to be respectful to the API
+            time.sleep(settings.CKAN_REQUEST_DELAY)
+        first = False
+
+        page = fetch_permits_from_ckan(
+            days=days, limit=page_size, session=session, stats=stats, after=after, before=before
+        )
+
+        if not page:
+            logger.info(f"No more records found after {after}")
+            break
+
+        after = page_key(page)
+        yield page
+
+        # If we got fewer records than requested, we've reached the end
+        if len(page) < page_size:
+            logger.info(f"Received fewer than {page_size} records. Pagination complete.")
+            break
+
+
 def fetch_all_permits_paginated(days: int = 90, batch_size: int = 10000) -> list:
     """
     Fetch all permits for a date range using pagination.
     Continues fetching until no more records are returned.
+    Prefer iter_permit_pages for large ranges - this holds every record.
 
     Args:
         days: Number of days back to fetch
@@ -89,142 +299,812 @@ def fetch_all_permits_paginated(days: int = 90, batch_size: int = 10000) -> list
         List of all permit records
     """
     all_records = []
-    offset = 0
+    with requests.Session() as session:
+        for page in iter_permit_pages(days=days, page_size=batch_size, session=session):
+            all_records.extend(page)
+            logger.info(f"Fetched batch of {len(page)} records. Total so far: {len(all_records)}")
+    return all_records
 
-    while True:
-        batch = fetch_permits_from_ckan(days=days, limit=batch_size, offset=offset)
 
-        if not batch:
-            logger.info(f"No more records found. Total fetched: {len(all_records)}")
-            break
+_END_OF_STREAM = object()
 
-        all_records.extend(batch)
-        offset += len(batch)
 
-        logger.info(f"Fetched batch of {len(batch)} records. Total so far: {len(all_records)}")
+def prefetch(items: Iterable, depth: int) -> Iterator:
+    """
+    Run an iterable in a background thread, buffering at most `depth`
+    items in a bounded queue. The producer blocks when the consumer falls
+    behind, and exceptions raised by the producer are re-raised here.
+    Closing the returned generator stops the producer.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
 
-        # If we got fewer records than requested, we've reached the end
-        if len(batch) < batch_size:
-            logger.info(f"Received fewer than {batch_size} records. Pagination complete.")
-            break
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
 
-        # Add a small delay between requests to be respectful to the API
-        import time
-        time.sleep(1)
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_END_OF_STREAM)
+        except BaseException as e:
+            put(e)
+        finally:
+            # Propagate shutdown to upstream generators (and their threads)
+            close = getattr(items, "close", None)
+            if close:
+                close()
 
-    return all_records
+    producer = threading.Thread(target=produce, name="sync-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END_OF_STREAM:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
 
 
-def sync_permits(days: int = None) -> dict:
+def iter_normalized_pages(
+    days: int,
+    page_size: Optional[int] = None,
+    stats: Optional[SyncStats] = None,
+    after: Optional[PageKey] = None,
+    before: Optional[PageKey] = None
+) -> Iterator[tuple]:
+    """
+    Fetch and normalize permit pages as a two-stage pipeline.
+    Page N+1 downloads while page N is normalized, and normalized pages
+    queue up (bounded by SYNC_QUEUE_DEPTH) while the caller writes them.
+    Yields (record_count, batch, first key, last key) per page, batch
+    being a normalize.PermitBatch.
+    """
+    depth = settings.SYNC_QUEUE_DEPTH
+
+    def normalize_pages(pages: Iterator[list]) -> Iterator[tuple]:
+        try:
+            for page in pages:
+                with _phase(stats, "normalize"):
+                    batch = normalize_records(page)
+                yield len(page), batch, record_key(page[0]), page_key(page)
+        finally:
+            pages.close()
+
+    with requests.Session() as session:
+        pages = prefetch(
+            iter_permit_pages(
+                days=days, page_size=page_size, session=session, stats=stats,
+                after=after, before=before
+            ),
+            depth
+        )
+        yield from prefetch(normalize_pages(pages), depth)
+
+
+def checkpoint_mark(checkpoint: dict) -> Optional[PageKey]:
+    """Key of the last record a checkpoint committed, None if nothing was"""
+    if checkpoint["last_issued_date"] is None:
+        return None
+    return checkpoint["last_issued_date"], checkpoint["last_id"]
+
+
+def checkpoint_head(checkpoint: dict) -> Optional[PageKey]:
+    """Key of the newest record a checkpoint's window saw, None if none yet"""
+    if checkpoint["head_issued_date"] is None:
+        return None
+    return checkpoint["head_issued_date"], checkpoint["head_id"]
+
+
+def resume_passes(
+    mark: Optional[PageKey],
+    head: Optional[PageKey]
+) -> List[Tuple[Optional[PageKey], Optional[PageKey], bool]]:
+    """
+    (after, before, advances checkpoint) for each pass over a window
+    resumed at `mark`, whose first page started at `head`.
+
+    Everything from head down to the mark was committed before the
+    interruption, so only permits published since are read first: those
+    issued on or after head's issue date (later publications on the same
+    date sort after head by _id). The mark does not move. The tail after
+    the mark then continues the checkpoint as usual. A permit published
+    with an older issue date lands between the two and is picked up by
+    the next sync, which reads its whole range again.
+    """
+    if mark is None:
+        return [(None, None, True)]
+    if head is None:
+        # Checkpoints saved before heads were recorded re-read down to the mark
+        return [(None, mark, False), (mark, None, True)]
+    return [(None, (head[0], MAX_ROW_ID), False), (mark, None, True)]
+
+
+def _sync_checkpoint(conn, days: int, sync_id: int, resume: bool) -> Tuple[Tuple[date, date], Optional[dict]]:
+    """
+    Window and unfinished checkpoint for an incremental sync: those of an
+    interrupted earlier run when resuming, otherwise a fresh window for
+    the last `days` days and None. Raises ValueError rather than resume a
+    run that covered a different number of days.
+    """
+    if resume:
+        for checkpoint in get_checkpoints(conn, "sync"):
+            if checkpoint["completed_at"] is None:
+                window = (checkpoint["window_start"], checkpoint["window_end"])
+                planned_days = (window[1] - window[0]).days - 1
+                if planned_days != days:
+                    raise ValueError(
+                        f"An interrupted {planned_days}-day sync is unfinished; resume it with "
+                        f"days={planned_days}, or reset checkpoints to start a {days}-day sync"
+                    )
+                logger.info(
+                    f"Resuming interrupted sync of permits issued since {window[0]} "
+                    f"after {checkpoint_mark(checkpoint)} "
+                    f"({checkpoint['records_committed']} records committed)"
+                )
+                return window, checkpoint
+
+    window = ((datetime.now() - timedelta(days=days)).date(), date.today() + timedelta(days=1))
+    plan_checkpoints(conn, "sync", [window], sync_id)
+    return window, None
+
+
+def sync_permits(days: int = None, resume: bool = True) -> dict:
     """
     Main sync function - fetch permits from CKAN and upsert to database.
     Returns dict with sync statistics.
+
+    Each page is committed together with its rollup days and the sync's
+    checkpoint - the (issued_date, _id) key of its last record - so a run
+    that dies part way keeps the pages it loaded. With resume (the
+    default) the next run picks up an unfinished checkpoint instead of
+    starting over: it fetches permits published ahead of the run's first
+    page since the crash, then continues after the saved key (see
+    resume_passes). The checkpoint is only completed once both are in.
+
+    Only one sync or backfill runs at a time: if another holds the sync
+    lock, this raises RuntimeError before doing anything.
     """
     if days is None:
         days = settings.SYNC_DAYS_BACK
 
     logger.info(f"Starting sync job at {datetime.now().isoformat()}")
-    logger.info(f"Syncing permits from last {days} days")
+    stats = SyncStats()
 
     # Initialize database if needed
     try:
-        init_db()
+        with stats.phase("init"):
+            init_db()
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
 
-    with get_db_connection() as conn:
+    # The advisory lock keeps a backfill or another sync from rewriting the
+    # same permits and rollup days concurrently
+    with get_db_connection() as conn, sync_lock(conn):
         # Create sync log entry
         sync_id = create_sync_log(conn)
         logger.info(f"Created sync log entry with ID: {sync_id}")
 
+        fetched_count = 0
         inserted_count = 0
         updated_count = 0
-        records = []
+        unchanged_count = 0
+        quarantined_count = 0
+        touched_days = set()
 
         try:
-            # Fetch from CKAN API
-            records = fetch_permits_from_ckan(days=days)
-
-            # Process each record
-            for i, record in enumerate(records, 1):
-                try:
-                    was_inserted, permit_number = upsert_permit(conn, record)
+            window, checkpoint = _sync_checkpoint(conn, days, sync_id, resume)
+            mark, head, committed = None, None, 0
+            if checkpoint is not None:
+                mark, head = checkpoint_mark(checkpoint), checkpoint_head(checkpoint)
+                committed = checkpoint["records_committed"]
+            # The window starts on a fixed date; count days back from today
+            days = (date.today() - window[0]).days
+            logger.info(f"Syncing permits from last {days} days")
 
-                    if was_inserted:
-                        inserted_count += 1
-                    else:
-                        updated_count += 1
+            # Stream pages from CKAN; each page is merged with one set-based
+            # upsert and committed with its checkpoint
+            page_number = 0
+            for after, before, advances in resume_passes(mark, head):
+                with closing(iter_normalized_pages(days=days, stats=stats, after=after, before=before)) as pages:
+                    for record_count, batch, first_key, last_key in pages:
+                        with stats.phase("load"):
+                            result = load_permit_rows(conn, batch, sync_id=sync_id)
+                        # Re-aggregate the stats rollup for days whose permits changed
+                        with stats.phase("rollup"):
+                            refresh_daily_rollup(conn, result["touched_days"])
+                        if advances:
+                            committed += record_count
+                            advance_checkpoint(conn, "sync", window, committed, first_key, last_key, sync_id)
+                        with stats.phase("commit"):
+                            conn.commit()
 
-                    # Log progress every 100 records
-                    if i % 100 == 0:
-                        logger.info(f"Processed {i}/{len(records)} records")
+                        page_number += 1
+                        fetched_count += record_count
+                        inserted_count += result["inserted"]
+                        updated_count += result["updated"]
+                        unchanged_count += result["unchanged"]
+                        quarantined_count += result["quarantined"]
+                        touched_days |= result["touched_days"]
+                        logger.info(
+                            f"Loaded page {page_number}: {record_count} records "
+                            f"({fetched_count} total fetched, checkpoint after {last_key if advances else mark})"
+                        )
 
-                except Exception as e:
-                    logger.warning(f"Failed to upsert permit {record.get('permitnumber')}: {e}")
-                    continue
-
-            # Commit all changes
+            complete_checkpoint(conn, "sync", window, sync_id)
             conn.commit()
+            logger.info(f"Refreshed daily rollup for {len(touched_days)} days")
 
             # Update sync log with success
             update_sync_log(
                 conn,
                 sync_id,
-                records_fetched=len(records),
+                records_fetched=fetched_count,
                 records_inserted=inserted_count,
                 records_updated=updated_count,
-                status="success"
+                status="success",
+                records_quarantined=quarantined_count,
+                records_unchanged=unchanged_count
             )
 
+            # Warm the low-zoom density tiles for the new generation. The
+            # data is already committed, so a failure here only costs the
+            # API some on-demand tile builds.
+            try:
+                with stats.phase("tiles"):
+                    tiles = precompute_tiles(conn, format_generation(get_sync_generation(conn)))
+                    conn.commit()
+                logger.info(f"Precomputed {tiles} density tiles")
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Tile precompute failed: {e}")
+
+            # The run is already logged as a success; losing its timings
+            # must not turn it into a failure
+            performance = stats.summary(fetched_count)
+            try:
+                record_sync_performance(conn, sync_id, performance)
+            except Exception as perf_error:
+                conn.rollback()
+                logger.warning(f"Could not record sync performance: {perf_error}")
+
             logger.info(
                 f"Sync completed successfully: "
                 f"{inserted_count} inserted, {updated_count} updated, "
-                f"{len(records)} total fetched"
+                f"{unchanged_count} unchanged, "
+                f"{quarantined_count} quarantined, {fetched_count} total fetched"
+            )
+            logger.info(
+                f"Sync took {performance['duration_seconds']}s "
+                f"({performance['records_per_second']} records/s, "
+                f"{performance['pages_fetched']} pages, {performance['bytes_downloaded']} bytes); "
+                f"phases: {performance['phase_seconds']}"
             )
 
             return {
                 "status": "success",
-                "fetched": len(records),
+                "fetched": fetched_count,
                 "inserted": inserted_count,
-                "updated": updated_count
+                "updated": updated_count,
+                "unchanged": unchanged_count,
+                "quarantined": quarantined_count,
+                "performance": performance
             }
 
         except Exception as e:
-            # Rollback on error
+            # Rollback the page in progress; committed pages and the
+            # checkpoint covering them stay for the next run to resume from
             conn.rollback()
 
             # Update sync log with error
             update_sync_log(
                 conn,
                 sync_id,
-                records_fetched=len(records),
+                records_fetched=fetched_count,
                 records_inserted=inserted_count,
                 records_updated=updated_count,
                 status="error",
-                error_message=str(e)
+                error_message=str(e),
+                records_quarantined=quarantined_count,
+                records_unchanged=unchanged_count
             )
+            try:
+                record_sync_performance(conn, sync_id, stats.summary(fetched_count))
+            except Exception as perf_error:
+                conn.rollback()
+                logger.warning(f"Could not record sync performance: {perf_error}")
 
             logger.error(f"Sync failed: {e}")
             raise
 
 
-if __name__ == "__main__":
-    # Allow overriding days via command line argument
-    # Usage: python -m backend.sync_job [days]
-    days = None
-    if len(sys.argv) > 1:
+# Historical backfill: the date range is split into windows that are
+# fetched concurrently, normalized in a process pool and loaded through
+# the bulk path, one committed page at a time.
+
+def date_windows(start: date, end: date, window_days: int) -> List[Tuple[date, date]]:
+    """Split [start, end) into [from, to) windows of window_days, newest first"""
+    windows = []
+    upper = end
+    while upper > start:
+        lower = max(start, upper - timedelta(days=window_days))
+        windows.append((lower, upper))
+        upper = lower
+    return windows
+
+
+def _range_condition(start: date, end: date) -> str:
+    return f""""issued_date" >= '{start.isoformat()}' AND "issued_date" < '{end.isoformat()}'"""
+
+
+def count_permits_in_range(start: date, end: date, session: Optional[requests.Session] = None) -> int:
+    """Number of permits CKAN has issued in [start, end)"""
+    sql = f'''
+        SELECT COUNT(*) AS count FROM "{settings.CKAN_RESOURCE_ID}"
+        WHERE {_range_condition(start, end)}
+    '''
+    return int(query_ckan(sql, session=session)[0]["count"])
+
+
+def fetch_permit_window(
+    start: date,
+    end: date,
+    limit: int,
+    after: Optional[PageKey] = None,
+    before: Optional[PageKey] = None,
+    session: Optional[requests.Session] = None,
+    stats: Optional[SyncStats] = None
+) -> list:
+    """
+    One page of permits issued in [start, end), in the same order as
+    fetch_permits_from_ckan, after and before keys as in _keyset_condition
+    """
+    sql = f'''
+        SELECT * FROM "{settings.CKAN_RESOURCE_ID}"
+        WHERE {_range_condition(start, end)}{_keyset_condition(after, before)}
+        ORDER BY "issued_date" DESC, "_id"
+        LIMIT {limit}
+    '''
+    return query_ckan(sql, session=session, stats=stats)
+
+
+class RateLimiter:
+    """Spaces calls, across threads, at most `rate` per second (0 disables)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _normalize_page(records: list) -> tuple:
+    """normalize_records plus its run time (module level so worker processes can run it)"""
+    start = time.perf_counter()
+    batch = normalize_records(records)
+    return batch, time.perf_counter() - start
+
+
+def _normalizer_pool(processes: int):
+    """
+    Process pool for normalization, or None to normalize inline when
+    only one process is wanted. Workers are spawned rather than forked
+    because fetch threads and pooled connections are already running.
+    """
+    if processes <= 1:
+        return nullcontext(None)
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+
+
+class BackfillProgress:
+    """Loaded records against the expected total, with rate and ETA"""
+
+    def __init__(self, windows: int, expected: Optional[int], interval: float):
+        self.windows = windows
+        self.expected = expected
+        self.interval = interval
+        self.windows_done = 0
+        self.records = 0
+        self._started = time.monotonic()
+        self._logged = self._started
+
+    def fraction(self) -> float:
+        if self.expected:
+            return min(1.0, self.records / self.expected)
+        return self.windows_done / self.windows if self.windows else 1.0
+
+    def eta_seconds(self) -> Optional[float]:
+        done = self.fraction()
+        if done <= 0:
+            return None
+        elapsed = time.monotonic() - self._started
+        return elapsed * (1 - done) / done
+
+    def log(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._logged < self.interval:
+            return
+        self._logged = now
+        elapsed = now - self._started
+        rate = self.records / elapsed if elapsed else 0.0
+        eta = self.eta_seconds()
+        expected = f"/{self.expected}" if self.expected is not None else ""
+        logger.info(
+            f"Backfill {self.fraction():.0%}: {self.records}{expected} records, "
+            f"{self.windows_done}/{self.windows} windows, {rate:.0f} records/s, "
+            f"ETA {timedelta(seconds=round(eta)) if eta is not None else 'unknown'}"
+        )
+
+
+def backfill_permits(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    window_days: Optional[int] = None,
+    workers: Optional[int] = None,
+    processes: Optional[int] = None,
+    requests_per_second: Optional[float] = None,
+    page_size: Optional[int] = None,
+    resume: bool = True
+) -> dict:
+    """
+    Load permits issued in [start, end) - by default the last
+    BACKFILL_DAYS through today - as a sync run in sync_log.
+
+    The range is split into window_days windows, newest first. `workers`
+    threads each page through one window at a time, sharing a rate limit
+    of requests_per_second. Pages are normalized by `processes` worker
+    processes (0 = one per CPU, 1 = inline) and loaded in this thread
+    with load_permit_rows, committing each page. Memory stays bounded by
+    the page queue and the pages in flight to the pool. Progress and an
+    ETA are logged every BACKFILL_PROGRESS_SECONDS.
+
+    Every window is checkpointed: each page commits with the key of its
+    last record, and a window is marked complete once its last page is in.
+    With resume (the default) an interrupted backfill's unfinished windows
+    are picked up as sync_permits does - head re-read down to the saved
+    key, then the rest after it - and start/end/window_days are ignored
+    until those windows are done or the checkpoints are reset.
+
+    Like sync_permits, fails straight away if another sync or backfill
+    holds the sync lock.
+    """
+    end = end or date.today() + timedelta(days=1)
+    start = start or end - timedelta(days=settings.BACKFILL_DAYS + 1)
+    window_days = window_days or settings.BACKFILL_WINDOW_DAYS
+    workers = max(1, workers or settings.BACKFILL_WORKERS)
+    if processes is None:
+        processes = settings.BACKFILL_PROCESSES
+    processes = processes or os.cpu_count() or 1
+    if requests_per_second is None:
+        requests_per_second = settings.BACKFILL_REQUESTS_PER_SECOND
+    page_size = page_size or settings.CKAN_PAGE_SIZE
+
+    stats = SyncStats()
+    with stats.phase("init"):
+        init_db()
+
+    checkpoints = []
+    if resume:
+        with get_db_connection() as conn:
+            checkpoints = get_checkpoints(conn, "backfill")
+    pending = [checkpoint for checkpoint in checkpoints if checkpoint["completed_at"] is None]
+    if pending:
+        windows = [(checkpoint["window_start"], checkpoint["window_end"]) for checkpoint in pending]
+        marks = {
+            window: (checkpoint_mark(checkpoint), checkpoint_head(checkpoint))
+            for window, checkpoint in zip(windows, pending)
+        }
+        committed = {window: checkpoint["records_committed"] for window, checkpoint in zip(windows, pending)}
+        start, end = min(window[0] for window in windows), max(window[1] for window in windows)
+        logger.info(
+            f"Resuming interrupted backfill: {len(windows)} of {len(checkpoints)} windows left, "
+            f"{sum(committed.values())} records already loaded in them"
+        )
+    else:
+        windows = date_windows(start, end, window_days)
+        marks, committed = {}, {}
+        logger.info(f"Starting backfill of {start} to {end}: {len(windows)} windows of {window_days} days")
+    logger.info(
+        f"{workers} fetch workers, {processes} normalize processes, "
+        f"{requests_per_second or 'unlimited'} requests/s"
+    )
+
+    limiter = RateLimiter(requests_per_second)
+    session = requests.Session()
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+
+    try:
+        limiter.wait()
+        # Approximate when resuming: windows finished inside the span still
+        # count, and resumed windows are read in full again
+        expected = count_permits_in_range(start, end, session=session)
+    except Exception as e:
+        logger.warning(f"Could not count permits in range, ETA will use windows: {e}")
+        expected = None
+    progress = BackfillProgress(len(windows), expected, settings.BACKFILL_PROGRESS_SECONDS)
+
+    pages: queue.Queue = queue.Queue(maxsize=workers * max(1, settings.SYNC_QUEUE_DEPTH))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch_window(window: Tuple[date, date]):
+        """
+        Page through one window from its checkpoint, queueing
+        ("page", (window, (first key, last key) or None, records)) then
+        ("done", window); head pages re-read on resume carry no keys
+        """
+        try:
+            for after, before, advances in resume_passes(*marks.get(window, (None, None))):
+                while not stop.is_set():
+                    limiter.wait()
+                    page = fetch_permit_window(
+                        *window, page_size, after, before, session=session, stats=stats
+                    )
+                    if not page:
+                        break
+                    keys = (record_key(page[0]), page_key(page))
+                    after = keys[1]
+                    if not put(("page", (window, keys if advances else None, page))):
+                        return
+                    if len(page) < page_size:
+                        break
+            put(("done", window))
+        except BaseException as e:
+            put(("error", e))
+
+    with get_db_connection() as conn, closing(session), sync_lock(conn):
+        sync_id = create_sync_log(conn)
+        logger.info(f"Created sync log entry with ID: {sync_id}")
+        totals = {"fetched": 0, "inserted": 0, "updated": 0, "unchanged": 0, "quarantined": 0}
+        touched_days = set()
+
         try:
-            days = int(sys.argv[1])
-            logger.info(f"Using command-line override: syncing {days} days")
-        except ValueError:
-            logger.error(f"Invalid days argument: {sys.argv[1]}")
-            sys.exit(1)
+            if not pending:
+                plan_checkpoints(conn, "backfill", windows, sync_id)
+
+            with _normalizer_pool(processes) as pool:
+                fetchers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill-fetch")
+                try:
+                    for window in windows:
+                        fetchers.submit(fetch_window, window)
+
+                    # Normalized pages in flight, in fetch order: (window,
+                    # checkpoint keys, record count, future). A window's end is queued as
+                    # an entry without a future, so it completes only after its
+                    # last page has been committed.
+                    in_flight = deque()
+                    max_in_flight = max(2, processes * 2)
+                    windows_left = len(windows)
+
+                    while windows_left or in_flight:
+                        oldest_ready = in_flight and (in_flight[0][3] is None or in_flight[0][3].done())
+                        if in_flight and (oldest_ready or not windows_left or len(in_flight) >= max_in_flight):
+                            window, keys, record_count, future = in_flight.popleft()
+                            if future is None:
+                                complete_checkpoint(conn, "backfill", window, sync_id)
+                                conn.commit()
+                                progress.windows_done += 1
+                                continue
+                            batch, seconds = future.result()
+                            stats.add_phase_time("normalize", seconds)
+                            with stats.phase("load"):
+                                result = load_permit_rows(conn, batch, sync_id=sync_id)
+                            with stats.phase("rollup"):
+                                refresh_daily_rollup(conn, result["touched_days"])
+                            # The page, its rollup days and the window's new key
+                            # commit together, so a crash never half-applies a
+                            # page. Head pages re-read on resume leave it alone.
+                            if keys is not None:
+                                committed[window] = committed.get(window, 0) + record_count
+                                advance_checkpoint(
+                                    conn, "backfill", window, committed[window], *keys, sync_id
+                                )
+                            with stats.phase("commit"):
+                                conn.commit()
+                            totals["fetched"] += record_count
+                            for key in ("inserted", "updated", "unchanged", "quarantined"):
+                                totals[key] += result[key]
+                            touched_days |= result["touched_days"]
+                            progress.records += record_count
+                            progress.log()
+                            continue
+
+                        try:
+                            kind, item = pages.get(timeout=0.1)
+                        except queue.Empty:
+                            continue
+                        if kind == "error":
+                            raise item
+                        if kind == "done":
+                            windows_left -= 1
+                            in_flight.append((item, None, 0, None))
+                            continue
+                        window, keys, records = item
+                        if pool is None:
+                            future = Future()
+                            future.set_result(_normalize_page(records))
+                        else:
+                            future = pool.submit(_normalize_page, records)
+                        in_flight.append((window, keys, len(records), future))
+                finally:
+                    stop.set()
+                    fetchers.shutdown(wait=True, cancel_futures=True)
+
+            progress.log(force=True)
+            logger.info(f"Refreshed daily rollup for {len(touched_days)} days")
+
+            try:
+                with stats.phase("tiles"):
+                    tiles = precompute_tiles(conn, format_generation(get_sync_generation(conn)))
+                    conn.commit()
+                logger.info(f"Precomputed {tiles} density tiles")
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Tile precompute failed: {e}")
+
+            update_sync_log(
+                conn,
+                sync_id,
+                records_fetched=totals["fetched"],
+                records_inserted=totals["inserted"],
+                records_updated=totals["updated"],
+                status="success",
+                records_quarantined=totals["quarantined"],
+                records_unchanged=totals["unchanged"]
+            )
+            performance = stats.summary(totals["fetched"])
+            try:
+                record_sync_performance(conn, sync_id, performance)
+            except Exception as perf_error:
+                conn.rollback()
+                logger.warning(f"Could not record sync performance: {perf_error}")
+
+            logger.info(
+                f"Backfill completed: {totals['fetched']} fetched, {totals['inserted']} inserted, "
+                f"{totals['updated']} updated, {totals['unchanged']} unchanged, "
+                f"{totals['quarantined']} quarantined in {performance['duration_seconds']}s "
+                f"({performance['records_per_second']} records/s)"
+            )
+            return {"status": "success", **totals, "performance": performance}
 
+        except Exception as e:
+            # Pages already committed stay loaded and checkpointed; only the
+            # current one is lost, and a resumed run fetches it again
+            conn.rollback()
+            update_sync_log(
+                conn,
+                sync_id,
+                records_fetched=totals["fetched"],
+                records_inserted=totals["inserted"],
+                records_updated=totals["updated"],
+                status="error",
+                error_message=str(e),
+                records_quarantined=totals["quarantined"],
+                records_unchanged=totals["unchanged"]
+            )
+            try:
+                record_sync_performance(conn, sync_id, stats.summary(totals["fetched"]))
+            except Exception as perf_error:
+                conn.rollback()
+                logger.warning(f"Could not record sync performance: {perf_error}")
+
+            logger.error(f"Backfill failed: {e}")
+            raise
+
+
+def show_checkpoints(job: Optional[str] = None):
+    """Print each job's checkpoint progress and its unfinished windows"""
+    init_db()
+    with get_db_connection() as conn:
+        checkpoints = get_checkpoints(conn, job)
+    if not checkpoints:
+        print("No sync checkpoints")
+        return
+    for name in sorted({checkpoint["job"] for checkpoint in checkpoints}):
+        windows = [checkpoint for checkpoint in checkpoints if checkpoint["job"] == name]
+        pending = [checkpoint for checkpoint in windows if checkpoint["completed_at"] is None]
+        latest = max(windows, key=lambda checkpoint: checkpoint["updated_at"])
+        state = "interrupted, will resume" if pending else "complete"
+        print(
+            f"{name}: {len(windows) - len(pending)}/{len(windows)} windows done, {state} "
+            f"(sync {latest['sync_id']}, updated {latest['updated_at']:%Y-%m-%d %H:%M:%S})"
+        )
+        for checkpoint in pending:
+            print(
+                f"  {checkpoint['window_start']} to {checkpoint['window_end']}: "
+                f"{checkpoint['records_committed']} records committed, "
+                f"last {checkpoint_mark(checkpoint)}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync building permits from Analyze Boston into PostgreSQL")
+    parser.add_argument("days", nargs="?", type=int,
+                        help="Days back to sync (default: SYNC_DAYS_BACK, or BACKFILL_DAYS with --backfill)")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Load history in parallel windows instead of one sequential pass")
+    parser.add_argument("--start", type=date.fromisoformat, help="Backfill from this issue date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Backfill up to, not including, this date")
+    parser.add_argument("--window-days", type=int, help="Backfill window length (default: BACKFILL_WINDOW_DAYS)")
+    parser.add_argument("--workers", type=int, help="Concurrent window fetches (default: BACKFILL_WORKERS)")
+    parser.add_argument("--processes", type=int,
+                        help="Normalize processes, 0 = one per CPU, 1 = inline (default: BACKFILL_PROCESSES)")
+    parser.add_argument("--rate", type=float,
+                        help="Max CKAN requests per second, 0 = unlimited (default: BACKFILL_REQUESTS_PER_SECOND)")
+    parser.add_argument("--checkpoints", choices=["resume", "show", "reset"], default="resume",
+                        help="resume: continue an interrupted run (default); show: print checkpoints and exit; "
+                             "reset: forget the sync's (or with --backfill, the backfill's) checkpoints and exit")
+    args = parser.parse_args()
+
+    job = "backfill" if args.backfill else "sync"
     try:
-        result = sync_permits(days=days)
+        if args.checkpoints == "show":
+            show_checkpoints()
+            sys.exit(0)
+        if args.checkpoints == "reset":
+            init_db()
+            with get_db_connection() as conn:
+                deleted = reset_checkpoints(conn, job)
+            logger.info(f"Reset {deleted} {job} checkpoints; the next {job} starts from scratch")
+            sys.exit(0)
+
+        if args.backfill:
+            start = args.start
+            if start is None and args.days is not None:
+                start = date.today() - timedelta(days=args.days)
+            result = backfill_permits(
+                start=start,
+                end=args.end,
+                window_days=args.window_days,
+                workers=args.workers,
+                processes=args.processes,
+                requests_per_second=args.rate
+            )
+        else:
+            if args.days is not None:
+                logger.info(f"Using command-line override: syncing {args.days} days")
+            result = sync_permits(days=args.days)
         logger.info(f"Sync result: {result}")
         sys.exit(0)
     except Exception as e:
         logger.error(f"Sync job failed: {e}")
         sys.exit(1)
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    # Usage: python -m backend.sync_job [days]
+    #        python -m backend.sync_job --backfill [--start YYYY-MM-DD] [--workers N]
+    #        python -m backend.sync_job [--backfill] --checkpoints show|reset
+    main()
@@ -0,0 +1,312 @@
+"""
+Boston Data Dashboard - Density Tiles
+Per-tile permit aggregates on the web map (XYZ) grid, cached per sync
+generation. Low zooms are precomputed by the sync job; higher zooms are
+computed on first request. Only Boston tiles for the default days window
+are kept on disk; other windows live in a bounded in-memory LRU.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+
+from psycopg.rows import tuple_row
+
+from .config import settings
+from .normalize import BOSTON_LAT_RANGE, BOSTON_LNG_RANGE, bbox_contains_boston
+
+logger = logging.getLogger(__name__)
+
+MAX_ZOOM = 20
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(minLng, minLat, maxLng, maxLat) of an XYZ web mercator tile"""
+    n = 2 ** z
+
+    def lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def tile_range(z: int) -> Tuple[range, range]:
+    """x and y ranges of the tiles at zoom z that cover Boston"""
+    n = 2 ** z
+
+    def column(lng: float) -> int:
+        return min(n - 1, int((lng + 180.0) / 360.0 * n))
+
+    def row(lat: float) -> int:
+        y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+        return min(n - 1, int(y))
+
+    return (
+        range(column(BOSTON_LNG_RANGE[0]), column(BOSTON_LNG_RANGE[1]) + 1),
+        range(row(BOSTON_LAT_RANGE[1]), row(BOSTON_LAT_RANGE[0]) + 1),
+    )
+
+
+def covers_boston(z: int, x: int, y: int) -> bool:
+    """True if the tile can contain permits with stored coordinates"""
+    xs, ys = tile_range(z)
+    return x in xs and y in ys
+
+
+def validate_tile(z: int, x: int, y: int):
+    """Raise ValueError for coordinates outside the XYZ grid"""
+    if not 0 <= z <= MAX_ZOOM:
+        raise ValueError(f"zoom must be between 0 and {MAX_ZOOM}")
+    n = 2 ** z
+    if not (0 <= x < n and 0 <= y < n):
+        raise ValueError(f"tile {z}/{x}/{y} is outside the grid")
+
+
+def build_tile(conn, z: int, x: int, y: int, days: int, grid: Optional[int] = None) -> bytes:
+    """
+    Aggregate permits issued in the last `days` days into a grid x grid
+    raster over the tile. Cells are returned as parallel arrays, like
+    /api/map/points, with the cell column/row in tile space (0 = west/north).
+    """
+    grid = grid or settings.TILE_GRID_SIZE
+    if not covers_boston(z, x, y):
+        return empty_tile(z, x, y, days, grid)
+
+    min_lng, min_lat, max_lng, max_lat = tile_bounds(z, x, y)
+    n = 2 ** z
+    with conn.cursor(row_factory=tuple_row) as cur:
+        # Cell row uses the mercator projection so cells line up with
+        # map pixels; the bbox test is served by idx_permits_location
+        # unless the tile spans the whole city
+        if bbox_contains_boston(min_lng, min_lat, max_lng, max_lat):
+            location_filter = "latitude IS NOT NULL AND longitude IS NOT NULL"
+        else:
+            location_filter = (
+                "point(longitude::float8, latitude::float8) <@ "
+                "box(point(%(min_lng)s, %(min_lat)s), point(%(max_lng)s, %(max_lat)s))"
+            )
+        cur.execute(f"""
+            /* tiles.build */
+            SELECT
+                LEAST(floor((longitude::float8 + 180) / 360 * %(cells)s::float8)::int
+                      - %(x)s::int * %(grid)s::int, %(grid)s::int - 1) AS cx,
+                LEAST(floor((1 - ln(tan(radians(latitude::float8))
+                                + 1 / cos(radians(latitude::float8))) / pi())
+                            / 2 * %(cells)s::float8)::int
+                      - %(y)s::int * %(grid)s::int, %(grid)s::int - 1) AS cy,
+                COUNT(*) AS count,
+                COALESCE(SUM(declared_valuation), 0)::float8 AS valuation,
+                mode() WITHIN GROUP (ORDER BY work_type) AS work_type
+            FROM permits
+            WHERE issued_date >= CURRENT_DATE - %(days)s::int
+              AND {location_filter}
+            GROUP BY 1, 2
+            ORDER BY 2, 1
+        """, {
+            "cells": n * grid, "grid": grid, "x": x, "y": y, "days": days,
+            "min_lng": min_lng, "min_lat": min_lat,
+            "max_lng": max_lng, "max_lat": max_lat,
+        })
+        cells = cur.fetchall()
+
+    return _encode_tile(z, x, y, days, grid, cells)
+
+
+def empty_tile(z: int, x: int, y: int, days: int, grid: Optional[int] = None) -> bytes:
+    """A tile with no cells, built without touching the database"""
+    return _encode_tile(z, x, y, days, grid or settings.TILE_GRID_SIZE, [])
+
+
+def _encode_tile(z: int, x: int, y: int, days: int, grid: int, cells: List[tuple]) -> bytes:
+    min_lng, min_lat, max_lng, max_lat = tile_bounds(z, x, y)
+    work_types = sorted({c[4] for c in cells if c[4] is not None})
+    work_type_index = {w: i for i, w in enumerate(work_types)}
+    tile = {
+        "z": z,
+        "x": x,
+        "y": y,
+        "days": days,
+        "bounds": [min_lng, min_lat, max_lng, max_lat],
+        "grid": grid,
+        "count": sum(c[2] for c in cells),
+        "cells": len(cells),
+        "cx": [max(c[0], 0) for c in cells],
+        "cy": [max(c[1], 0) for c in cells],
+        "counts": [c[2] for c in cells],
+        "valuation": [c[3] for c in cells],
+        "work_type": [work_type_index.get(c[4], -1) for c in cells],
+        "work_types": work_types,
+    }
+    return json.dumps(tile, separators=(",", ":")).encode("utf-8")
+
+
+class TileStore:
+    """
+    Tiles on disk under <root>/<generation>/<days>/<z>/<x>/<y>.json.
+    A new generation gets a fresh directory, so stale tiles are never
+    served; prune() removes the directories of older generations.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    @staticmethod
+    def _generation_dir(generation: str) -> str:
+        return generation.replace(":", "_")
+
+    def path(self, generation: str, days: int, z: int, x: int, y: int) -> Path:
+        return self.root / self._generation_dir(generation) / str(days) / str(z) / str(x) / f"{y}.json"
+
+    def get(self, generation: str, days: int, z: int, x: int, y: int) -> Optional[bytes]:
+        try:
+            return self.path(generation, days, z, x, y).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, generation: str, days: int, z: int, x: int, y: int, body: bytes):
+        """Write a tile atomically so readers never see a partial file"""
+        path = self.path(generation, days, z, x, y)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+
+    def prune(self, keep: str) -> int:
+        """Delete every generation directory except `keep`; returns how many"""
+        if not self.root.is_dir():
+            return 0
+        keep_dir = self._generation_dir(keep)
+        removed = 0
+        for entry in self.root.iterdir():
+            if entry.is_dir() and entry.name != keep_dir:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+def get_tile_store() -> TileStore:
+    return TileStore(settings.TILE_CACHE_DIR)
+
+
+class TileMemoryCache:
+    """Thread-safe LRU of tile bodies keyed by (generation, days, z, x, y)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: tuple, body: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+memory_tiles = TileMemoryCache(settings.TILE_MEMORY_CACHE_ENTRIES)
+
+
+def is_disk_cached(z: int, x: int, y: int, days: int) -> bool:
+    """
+    Only Boston tiles for the default window go to disk: that keeps the
+    directory bounded by the grid, whatever zooms and windows are requested
+    """
+    return days == settings.TILE_DEFAULT_DAYS and covers_boston(z, x, y)
+
+
+# get_tile hits and misses since process start, per store ("memory" or "disk")
+_tile_hits = {"memory": 0, "disk": 0}
+_tile_misses = {"memory": 0, "disk": 0}
+_tile_stats_lock = threading.Lock()
+
+
+def get_tile_cache_stats() -> Dict[str, Dict]:
+    """Lookup counters for the in-memory LRU and the disk store, keyed by store"""
+    with _tile_stats_lock:
+        stats = {}
+        for store in ("memory", "disk"):
+            hits, misses = _tile_hits[store], _tile_misses[store]
+            lookups = hits + misses
+            stats[store] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            }
+    stats["memory"]["entries"] = len(memory_tiles)
+    return stats
+
+
+def get_tile(conn, generation: str, z: int, x: int, y: int, days: int) -> bytes:
+    """
+    Serve a tile, building it on a miss. Tiles outside Boston are empty
+    and never stored; default-window Boston tiles are cached on disk and
+    everything else in the in-memory LRU.
+    """
+    if not covers_boston(z, x, y):
+        return empty_tile(z, x, y, days)
+
+    on_disk = is_disk_cached(z, x, y, days)
+    store = get_tile_store()
+    key = (generation, days, z, x, y)
+    body = store.get(generation, days, z, x, y) if on_disk else memory_tiles.get(key)
+    with _tile_stats_lock:
+        if body is None:
+            _tile_misses["disk" if on_disk else "memory"] += 1
+        else:
+            _tile_hits["disk" if on_disk else "memory"] += 1
+    if body is None:
+        body = build_tile(conn, z, x, y, days)
+        if not on_disk:
+            memory_tiles.put(key, body)
+            return body
+        try:
+            store.put(generation, days, z, x, y, body)
+        except OSError as e:
+            logger.warning(f"Could not cache tile {z}/{x}/{y}: {e}")
+    return body
+
+
+def iter_precompute_tiles(max_zoom: int) -> Iterator[Tuple[int, int, int]]:
+    """Every (z, x, y) covering Boston from zoom 0 up to max_zoom"""
+    for z in range(max_zoom + 1):
+        xs, ys = tile_range(z)
+        for x in xs:
+            for y in ys:
+                yield z, x, y
+
+
+def precompute_tiles(conn, generation: str, days: Optional[int] = None, max_zoom: Optional[int] = None) -> int:
+    """
+    Build the low-zoom tiles for a generation and drop older generations.
+    Returns the number of tiles written.
+    """
+    days = days or settings.TILE_DEFAULT_DAYS
+    max_zoom = settings.TILE_PRECOMPUTE_MAX_ZOOM if max_zoom is None else max_zoom
+    store = get_tile_store()
+
+    written = 0
+    for z, x, y in iter_precompute_tiles(max_zoom):
+        store.put(generation, days, z, x, y, build_tile(conn, z, x, y, days))
+        written += 1
+    store.prune(keep=generation)
+    return written
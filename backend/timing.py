@@ -0,0 +1,52 @@
+"""
+Boston Data Dashboard - Request Timing
+Per-request accounting of database time, reported in a Server-Timing header
+"""
+
+from contextvars import ContextVar
+from typing import List, Optional
+import time
+
+# Milliseconds spent in run_db calls for the current request, or None
+# outside a request
+_request_db_ms: ContextVar[Optional[List[float]]] = ContextVar("request_db_ms", default=None)
+
+
+def record_db_time(elapsed_ms: float):
+    """Add database time to the current request, if there is one"""
+    totals = _request_db_ms.get()
+    if totals is not None:
+        totals[0] += elapsed_ms
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding Server-Timing: db;dur=<ms>, app;dur=<ms> to
+    HTTP responses. Must wrap the response cache so cached headers never
+    carry a stale timing, and cache hits report db;dur=0.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        totals = [0.0]
+        token = _request_db_ms.set(totals)
+        start = time.perf_counter()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - start) * 1000
+                value = f"db;dur={totals[0]:.2f}, app;dur={app_ms:.2f}".encode("latin-1")
+                headers = [h for h in message.get("headers", []) if h[0].lower() != b"server-timing"]
+                message = {**message, "headers": headers + [(b"server-timing", value)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _request_db_ms.reset(token)
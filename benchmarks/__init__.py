@@ -0,0 +1 @@
+"""Boston Data Dashboard - Performance Benchmarks"""
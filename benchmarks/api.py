@@ -0,0 +1,276 @@
+"""
+Boston Data Dashboard - API Benchmark Suite
+Seeds synthetic permits at a chosen scale, drives every endpoint with
+concurrent clients and saves latency, throughput and DB time as JSON
+
+Usage:
+    DATABASE_URL=postgresql://localhost/boston_permits_bench \
+        python -m benchmarks.api --rows 1000000 --concurrency 1,8,32
+
+    # Compare against an earlier run
+    python -m benchmarks.api --skip-seed --compare benchmarks/results/api-<old>.json
+
+Without --url the API is started in-process on a free port with the
+response cache disabled (pass --cache to keep it), so every request
+reaches Postgres. DB time comes from the Server-Timing header, i.e. the
+time the request spent in run_db calls. Results go to benchmarks/results/
+named after the commit and time, so runs can be compared across commits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import requests
+
+from .load_test import percentile
+from .synthetic import seed_database
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+DOWNTOWN_BBOX = "-71.07,42.345,-71.05,42.365"
+
+
+class Endpoint(NamedTuple):
+    name: str
+    path: str
+
+
+ENDPOINTS: List[Endpoint] = [
+    Endpoint("permits", "/api/permits?days=30&limit=100"),
+    Endpoint("permits_zip", "/api/permits?days=365&zip=02124&limit=100"),
+    Endpoint("permits_work_type", "/api/permits?days=365&work_type=ROOF&limit=100&total=estimate"),
+    Endpoint("permits_large_page", "/api/permits?days=90&limit=1000&total=none"),
+    Endpoint("permits_cursor", "/api/permits?days=365&limit=100&total=none&cursor={cursor}"),
+    Endpoint("permits_bbox", f"/api/permits?days=365&limit=100&bbox={DOWNTOWN_BBOX}"),
+    Endpoint("permit", "/api/permits/{permit_number}"),
+    Endpoint("search", "/api/search?q=roof+deck"),
+    Endpoint("search_date", "/api/search?q=solar&sort=date&days=365"),
+    Endpoint("map_points", "/api/map/points?days=90&limit=5000"),
+    Endpoint("map_points_bbox", f"/api/map/points?days=3650&limit=5000&bbox={DOWNTOWN_BBOX}"),
+    Endpoint("map_clusters", "/api/map/clusters?zoom=12&days=90&bbox=-71.25,42.2,-70.85,42.42"),
+    Endpoint("tile", "/api/tiles/13/2477/3030?days=365"),
+    Endpoint("stats", "/api/stats?days=90"),
+    Endpoint("neighborhoods", "/api/neighborhoods"),
+    Endpoint("work_types", "/api/work-types"),
+    Endpoint("sync_status", "/api/sync-status"),
+    Endpoint("health", "/api/health"),
+]
+
+
+def _server_timing(header: Optional[str], metric: str) -> Optional[float]:
+    """Duration of one metric from a Server-Timing header"""
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if name == metric and params.startswith("dur="):
+            return float(params[4:])
+    return None
+
+
+def run_endpoint(base_url: str, path: str, requests_total: int, concurrency: int) -> Dict:
+    """Issue requests_total GETs of path with concurrency clients"""
+    local = threading.local()
+    latencies: List[float] = []
+    db_times: List[float] = []
+    sizes: List[int] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one_request(_):
+        nonlocal errors
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=300)
+            ok = response.status_code < 400
+        except requests.exceptions.RequestException:
+            response, ok = None, False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed_ms)
+            if not ok:
+                errors += 1
+            if response is not None:
+                sizes.append(len(response.content))
+                db_ms = _server_timing(response.headers.get("server-timing"), "db")
+                if db_ms is not None:
+                    db_times.append(db_ms)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_request, range(requests_total)))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests_total,
+        "errors": errors,
+        "throughput_rps": round(requests_total / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "db_p50_ms": round(percentile(db_times, 50), 2),
+        "db_p95_ms": round(percentile(db_times, 95), 2),
+        "db_mean_ms": round(sum(db_times) / len(db_times), 2) if db_times else None,
+        "response_bytes": round(sum(sizes) / len(sizes)) if sizes else 0,
+    }
+
+
+def resolve_paths(base_url: str) -> Dict[str, str]:
+    """Fill in endpoint paths that need a live value (cursor, permit number)"""
+    first = requests.get(base_url + "/api/permits?days=365&limit=100&total=none", timeout=300).json()
+    values = {
+        "cursor": first.get("next_cursor") or "",
+        "permit_number": first["data"][0]["permit_number"] if first.get("data") else "SYN00000000",
+    }
+    return {e.name: e.path.format(**values) for e in ENDPOINTS}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def serve_api(cache: bool) -> Iterator[str]:
+    """Run backend.main:app with uvicorn in a background thread"""
+    import uvicorn
+    from backend import main as api
+
+    if not cache:
+        # Nothing fits in a zero-entry cache, so every request reaches Postgres
+        api.response_cache.max_entries = 0
+        api.response_cache.clear()
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="api-under-test", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline_path: str):
+    """Print p50/p95 and throughput changes against a saved run"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    print(f"{'endpoint':<20} {'c':>3} {'p50 ms':>16} {'p95 ms':>16} {'rps':>16}")
+    for name, runs in current["endpoints"].items():
+        old_runs = {r["concurrency"]: r for r in baseline["endpoints"].get(name, [])}
+        for run in runs:
+            old = old_runs.get(run["concurrency"])
+            if not old:
+                continue
+            print(
+                f"{name:<20} {run['concurrency']:>3} "
+                f"{old['p50_ms']:>7.1f}->{run['p50_ms']:<7.1f} "
+                f"{old['p95_ms']:>7.1f}->{run['p95_ms']:<7.1f} "
+                f"{old['throughput_rps']:>7.1f}->{run['throughput_rps']:<7.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end API benchmark")
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic permits to seed (10k-5M)")
+    parser.add_argument("--years", type=float, default=5, help="Years of issue dates to spread over")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data")
+    parser.add_argument("--skip-seed", action="store_true", help="Use the data already in DATABASE_URL")
+    parser.add_argument("--url", help="Benchmark a running API instead of starting one")
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint and concurrency")
+    parser.add_argument("--only", help="Comma-separated endpoint names to run")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/api-<commit>-<time>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    concurrency_levels = [int(c) for c in args.concurrency.split(",")]
+    selected = [e for e in ENDPOINTS if not args.only or e.name in args.only.split(",")]
+
+    total_rows = None
+    if not args.skip_seed:
+        start = time.perf_counter()
+        total_rows = seed_database(args.rows, years=args.years, seed=args.seed)
+        print(f"Seeded {total_rows} permits in {time.perf_counter() - start:.1f}s")
+
+    results: Dict = {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": total_rows if total_rows is not None else args.rows,
+            "seeded": not args.skip_seed,
+            "cache": bool(args.cache or args.url),
+            "url": args.url,
+            "requests": args.requests,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "endpoints": {},
+    }
+
+    server = serve_api(args.cache) if not args.url else None
+    try:
+        base_url = server.__enter__() if server else args.url.rstrip("/")
+        paths = resolve_paths(base_url)
+        print(f"{'endpoint':<20} {'c':>3} {'p50':>8} {'p95':>8} {'p99':>8} {'db p50':>8} {'rps':>8} {'err':>4}")
+        for endpoint in selected:
+            path = paths[endpoint.name]
+            requests.get(base_url + path, timeout=300)  # warm up
+            runs = []
+            for concurrency in concurrency_levels:
+                run = run_endpoint(base_url, path, args.requests, concurrency)
+                runs.append(run)
+                print(
+                    f"{endpoint.name:<20} {concurrency:>3} {run['p50_ms']:>8.1f} {run['p95_ms']:>8.1f} "
+                    f"{run['p99_ms']:>8.1f} {run['db_p50_ms']:>8.1f} {run['throughput_rps']:>8.1f} "
+                    f"{run['errors']:>4}"
+                )
+            results["endpoints"][endpoint.name] = runs
+    finally:
+        if server:
+            server.__exit__(None, None, None)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"api-{results['meta']['commit'] or 'unknown'}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Saved {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
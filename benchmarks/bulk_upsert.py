@@ -0,0 +1,82 @@
+"""
+Boston Data Dashboard - Bulk Upsert Benchmark
+Compares per-record upsert_permit against the COPY-based bulk loader
+
+Usage:
+    DATABASE_URL=postgresql://localhost/boston_permits_bench \
+        python -m benchmarks.bulk_upsert --rows 10000
+
+Each mode runs in its own transaction that is rolled back afterwards, so
+the target database is left unchanged. Both modes are measured twice:
+once inserting fresh rows and once updating the rows just inserted.
+"""
+
+import argparse
+import time
+
+from backend.database import (
+    get_db_connection,
+    init_db,
+    close_pool,
+    upsert_permit,
+    bulk_upsert_permits
+)
+from .synthetic import generate_batch
+
+
+def _per_record(conn, records):
+    for record in records:
+        upsert_permit(conn, record)
+
+
+def _bulk(conn, records):
+    bulk_upsert_permits(conn, records)
+
+
+def time_mode(load, records) -> dict:
+    """Time an insert pass and an update pass of records, then roll back"""
+    with get_db_connection() as conn:
+        try:
+            start = time.perf_counter()
+            load(conn, records)
+            insert_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            load(conn, records)
+            update_seconds = time.perf_counter() - start
+        finally:
+            conn.rollback()
+
+    return {
+        "insert_seconds": round(insert_seconds, 3),
+        "update_seconds": round(update_seconds, 3),
+        "insert_rows_per_sec": round(len(records) / insert_seconds),
+        "update_rows_per_sec": round(len(records) / update_seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-record vs bulk upsert benchmark")
+    parser.add_argument("--rows", type=int, default=10000, help="Records per run")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for synthetic data")
+    args = parser.parse_args()
+
+    init_db()
+    records = generate_batch(args.rows, seed=args.seed, start_index=90_000_000)
+
+    try:
+        per_record = time_mode(_per_record, records)
+        print(f"upsert_permit:       {per_record}")
+        bulk = time_mode(_bulk, records)
+        print(f"bulk_upsert_permits: {bulk}")
+    finally:
+        close_pool()
+
+    print(
+        f"Speedup: {per_record['insert_seconds'] / bulk['insert_seconds']:.1f}x insert, "
+        f"{per_record['update_seconds'] / bulk['update_seconds']:.1f}x update"
+    )
+
+
+if __name__ == "__main__":
+    main()
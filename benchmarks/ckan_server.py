@@ -0,0 +1,203 @@
+"""
+Boston Data Dashboard - Local CKAN Stand-in
+Serves datastore_search_sql over a generated dataset so the sync job can
+run offline
+
+Usage:
+    python -m benchmarks.ckan_server --rows 50000 --port 8765 --latency 0.2
+    CKAN_SQL_API_URL=http://localhost:8765/api/3/action/datastore_search_sql \
+        python -m backend.sync_job 365
+
+Only the query shapes issued by backend.sync_job are understood: an
+issued_date range (lower and optional upper bound), optionally limited to
+records after or before an (issued_date, _id) key, ORDER BY issued_date
+DESC with LIMIT/OFFSET, or COUNT(*) over the range.
+Like the real datastore, responses are capped at --max-records rows, and
+--latency/--jitter add a per-request delay to mimic a remote server.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List
+from urllib.parse import parse_qs, urlparse
+
+from .synthetic import generate_ckan_records
+
+SQL_PATH = "/api/3/action/datastore_search_sql"
+
+# datastore_search_sql never returns more rows than this per request
+CKAN_MAX_RECORDS = 32000
+
+_CUTOFF_RE = re.compile(r'"issued_date"\s*>=\s*\'([0-9-]+)\'')
+_UPPER_RE = re.compile(r'"issued_date"\s*<\s*\'([0-9-]+)\'')
+# Keyset conditions from backend.sync_job._keyset_condition
+_AFTER_RE = re.compile(
+    r'"issued_date"\s*<\s*\'([^\']*)\'\s*OR\s*\("issued_date"\s*=\s*\'[^\']*\'\s*AND\s*"_id"\s*>\s*(\d+)\)'
+)
+_BEFORE_RE = re.compile(
+    r'"issued_date"\s*>\s*\'([^\']*)\'\s*OR\s*\("issued_date"\s*=\s*\'[^\']*\'\s*AND\s*"_id"\s*<\s*(\d+)\)'
+)
+_COUNT_RE = re.compile(r"SELECT\s+COUNT\(\*\)", re.IGNORECASE)
+_LIMIT_RE = re.compile(r"LIMIT\s+(\d+)", re.IGNORECASE)
+_OFFSET_RE = re.compile(r"OFFSET\s+(\d+)", re.IGNORECASE)
+
+
+class CkanDataset:
+    """Records sorted newest first, as the real endpoint returns them"""
+
+    def __init__(self, records: List[Dict]):
+        for row_id, record in enumerate(records, 1):
+            record.setdefault("_id", row_id)
+        self.records = sorted(records, key=lambda r: (r["issued_date"], -r["_id"]), reverse=True)
+        # Ascending issue dates for cutoff lookups, ascending sort keys for keysets
+        self._dates = [r["issued_date"][:10] for r in reversed(self.records)]
+        self._keys = [(r["issued_date"], -r["_id"]) for r in reversed(self.records)]
+
+    def query(self, sql: str) -> List[Dict]:
+        """Answer a datastore_search_sql query from backend.sync_job"""
+        cutoff = _CUTOFF_RE.search(sql)
+        upper = _UPPER_RE.search(sql)
+        limit = _LIMIT_RE.search(sql)
+        offset = _OFFSET_RE.search(sql)
+        after = _AFTER_RE.search(sql)
+        before = _BEFORE_RE.search(sql)
+
+        # Matching records are a contiguous run of the newest-first list
+        total = len(self.records)
+        first = total - _bisect_left(self._dates, upper.group(1)) if upper else 0
+        last = total - _bisect_left(self._dates, cutoff.group(1)) if cutoff else total
+        if after:
+            first = max(first, total - _bisect_left(self._keys, (after.group(1), -int(after.group(2)))))
+        if before:
+            # Keys are (issued_date, -_id) ascending: "before" is strictly greater
+            last = min(last, total - _bisect_left(self._keys, (before.group(1), -int(before.group(2)) + 1)))
+        if _COUNT_RE.search(sql):
+            return [{"count": max(0, last - first)}]
+
+        start = first + (int(offset.group(1)) if offset else 0)
+        end = min(last, start + int(limit.group(1))) if limit else last
+        return self.records[start:end] if start < end else []
+
+
+def _bisect_left(values: List, target) -> int:
+    low, high = 0, len(values)
+    while low < high:
+        middle = (low + high) // 2
+        if values[middle] < target:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def make_handler(
+    dataset: CkanDataset,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    max_records: int = CKAN_MAX_RECORDS
+):
+    """
+    Build a request handler class bound to a dataset.
+    Each request sleeps latency +/- jitter seconds before answering and
+    returns at most max_records rows.
+    """
+
+    class CkanHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != SQL_PATH:
+                self._send(404, {"success": False, "error": {"message": "Not found"}})
+                return
+
+            if latency or jitter:
+                time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+
+            sql = parse_qs(url.query).get("sql", [""])[0]
+            records = dataset.query(sql)[:max_records]
+            self._send(200, {
+                "success": True,
+                "result": {"records": records, "fields": []},
+            })
+
+        def _send(self, status: int, payload: Dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return CkanHandler
+
+
+@contextmanager
+def serve_ckan(
+    records: List[Dict],
+    host: str = "127.0.0.1",
+    port: int = 0,
+    **handler_options
+) -> Iterator[str]:
+    """
+    Run a stand-in CKAN server in a background thread.
+    Yields the datastore_search_sql URL to use as CKAN_SQL_API_URL.
+    handler_options (latency, jitter, max_records) go to make_handler.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(CkanDataset(records), **handler_options))
+    thread = threading.Thread(target=server.serve_forever, name="ckan-stand-in", daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}{SQL_PATH}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local CKAN datastore_search_sql stand-in")
+    parser.add_argument("--rows", type=int, default=50000, help="Synthetic records to serve")
+    parser.add_argument("--years", type=float, default=5, help="Years of issue dates to spread over")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data")
+    parser.add_argument("--start-index", type=int, default=0,
+                        help="First synthetic permit number (offset to avoid seeded rows)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds on top of --latency")
+    parser.add_argument("--max-records", type=int, default=CKAN_MAX_RECORDS,
+                        help="Most rows returned per request")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (0 picks a free one)")
+    args = parser.parse_args()
+
+    records = list(generate_ckan_records(
+        args.rows, years=args.years, seed=args.seed, start_index=args.start_index
+    ))
+    handler = make_handler(
+        CkanDataset(records), latency=args.latency, jitter=args.jitter, max_records=args.max_records
+    )
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(
+        f"Serving {len(records)} permits at "
+        f"http://{args.host}:{server.server_address[1]}{SQL_PATH} (started {datetime.now():%H:%M:%S})",
+        flush=True
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Boston Data Dashboard - Query Plan Check
+Runs EXPLAIN (ANALYZE, BUFFERS) on every statement the API issues and
+fails on sequential scans of permits or blown latency budgets
+
+Usage:
+    DATABASE_URL=postgresql://localhost/boston_permits_bench \
+        python -m benchmarks.explain_plans --rows 200000
+
+Seeds synthetic permits (point DATABASE_URL at a scratch database), then
+calls each main.py query function with representative arguments while
+recording the SQL it executes. Every recorded SELECT is re-run under
+EXPLAIN and checked. Exits with status 1 if any check fails, so it can
+gate CI or a pre-deploy step.
+"""
+
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+from typing import Callable, Dict, List, NamedTuple
+
+import psycopg
+
+from backend.config import settings
+from backend.database import close_pool, get_db_connection
+from backend import main as api
+from backend.query_stats import query_tag, strip_tag
+from .synthetic import seed_database
+
+# Tables too large to ever scan sequentially (the rollup and sync_log are
+# small enough that a seq scan is often the right plan)
+LARGE_TABLES = {"permits"}
+
+BOSTON_BBOX = (-71.2, 42.2, -70.9, 42.4)
+DOWNTOWN_BBOX = (-71.07, 42.345, -71.05, 42.365)
+
+
+class Scenario(NamedTuple):
+    name: str
+    run: Callable[[], object]
+    budget_ms: float
+
+
+def _second_page(sort: str = None) -> Callable[[], object]:
+    """Fetch page one, then page two through its cursor"""
+    def run():
+        if sort:
+            tsquery = api.parse_search_query("roof")
+            first = api._query_search(tsquery, None, None, 3650, 50, sort)
+            return api._query_search(tsquery, None, None, 3650, 50, sort, first["next_cursor"])
+        first = api._query_permits(None, None, 365, 100, 0, total_mode="none")
+        return api._query_permits(None, None, 365, 100, 0, first["next_cursor"], total_mode="none")
+    return run
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("permits", lambda: api._query_permits(None, None, 30, 100, 0), 50),
+    Scenario("permits_zip", lambda: api._query_permits("02124", None, 365, 100, 0), 50),
+    Scenario("permits_work_type", lambda: api._query_permits(None, "ROOF", 365, 100, 0), 50),
+    Scenario("permits_zip_work_type", lambda: api._query_permits("02124", "ELECTRICAL", 365, 100, 0), 50),
+    Scenario("permits_estimate", lambda: api._query_permits(None, None, 365, 100, 0, total_mode="estimate"), 50),
+    Scenario("permits_cursor", _second_page(), 20),
+    Scenario("permits_fields", lambda: api._query_permits(
+        None, None, 90, 1000, 0, total_mode="none", fields=("permit_number", "issued_date")), 50),
+    Scenario("permits_bbox", lambda: api._query_permits(
+        None, None, 365, 100, 0, total_mode="estimate", bbox=DOWNTOWN_BBOX), 50),
+    Scenario("permit", lambda: api._query_permit("SYN00000001"), 10),
+    Scenario("search", lambda: api._query_search(api.parse_search_query("roof deck"), None, None, 3650, 50), 100),
+    Scenario("search_date", lambda: api._query_search(
+        api.parse_search_query("solar"), None, None, 3650, 50, "date"), 50),
+    Scenario("search_zip", lambda: api._query_search(
+        api.parse_search_query("insulation"), "02124", None, 3650, 50), 100),
+    Scenario("search_cursor", _second_page("relevance"), 100),
+    Scenario("map_points", lambda: api._query_map_points(None, None, 90, 5000), 100),
+    Scenario("map_points_bbox", lambda: api._query_map_points(None, None, 3650, 5000, DOWNTOWN_BBOX), 100),
+    Scenario("map_clusters", lambda: api._query_map_clusters(12, None, None, 90, 5000, BOSTON_BBOX), 500),
+    Scenario("tile", lambda: api._query_tile(12, 1238, 1515, settings.TILE_DEFAULT_DAYS, None), 300),
+    Scenario("stats", lambda: api._query_stats(90), 100),
+    Scenario("neighborhoods", api._query_neighborhoods, 300),
+    Scenario("sync_status", api._query_sync_status, 10),
+    Scenario("health", api._check_health, 10),
+]
+
+
+@contextmanager
+def capture_statements():
+    """Record (sql, params) for every statement executed on a psycopg cursor"""
+    statements = []
+    original = psycopg.Cursor.execute
+
+    def execute(self, query, params=None, **kwargs):
+        statements.append((query, params))
+        return original(self, query, params, **kwargs)
+
+    psycopg.Cursor.execute = execute
+    try:
+        yield statements
+    finally:
+        psycopg.Cursor.execute = original
+
+
+def _plan_nodes(node: Dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def explain(sql: str, params) -> Dict:
+    """EXPLAIN ANALYZE a SELECT and summarize its plan"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+            result = cur.fetchone()["QUERY PLAN"][0]
+
+    root = result["Plan"]
+    nodes = list(_plan_nodes(root))
+    return {
+        "ms": round(result["Execution Time"] + result["Planning Time"], 2),
+        "shared_hit": root.get("Shared Hit Blocks", 0),
+        "shared_read": root.get("Shared Read Blocks", 0),
+        "scans": sorted({
+            f"{n['Node Type']}:{n.get('Index Name') or n['Relation Name']}"
+            for n in nodes if "Relation Name" in n
+        }),
+        "seq_scans": sorted({
+            n["Relation Name"] for n in nodes
+            if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in LARGE_TABLES
+        }),
+    }
+
+
+def check_scenario(scenario: Scenario, budget_scale: float) -> List[Dict]:
+    with capture_statements() as statements:
+        scenario.run()
+
+    results = []
+    for number, (sql, params) in enumerate(statements, 1):
+        text = strip_tag(str(sql))
+        if not text.upper().startswith(("SELECT", "WITH")):
+            continue
+        summary = explain(text, params)
+        budget = scenario.budget_ms * budget_scale
+        problems = [f"seq scan on {t}" for t in summary["seq_scans"]]
+        if summary["ms"] > budget:
+            problems.append(f"{summary['ms']} ms over {budget:g} ms budget")
+        results.append({
+            "scenario": scenario.name,
+            "statement": number,
+            "query": query_tag(sql),
+            "budget_ms": budget,
+            "problems": problems,
+            **summary,
+        })
+    return results
+
+
+def vacuum_analyze():
+    """Refresh statistics and the visibility map so index-only scans apply"""
+    with psycopg.connect(settings.DATABASE_URL, autocommit=True) as conn:
+        conn.execute("VACUUM ANALYZE permits")
+        conn.execute("VACUUM ANALYZE permit_daily_rollup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE every API query and check the plans")
+    parser.add_argument("--rows", type=int, default=200000, help="Synthetic permits to seed")
+    parser.add_argument("--years", type=float, default=5, help="Years of issue dates to spread over")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="Multiply every latency budget (e.g. 2 on slow machines)")
+    parser.add_argument("--only", help="Comma-separated scenario names to run")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    selected = SCENARIOS
+    if args.only:
+        names = set(args.only.split(","))
+        selected = [s for s in SCENARIOS if s.name in names]
+
+    try:
+        total = seed_database(args.rows, years=args.years)
+        vacuum_analyze()
+        print(f"{total} permits in table")
+
+        # Warm the cache once so budgets measure steady-state latency
+        for scenario in selected:
+            scenario.run()
+
+        results = []
+        for scenario in selected:
+            results.extend(check_scenario(scenario, args.budget_scale))
+    finally:
+        close_pool()
+
+    print(f"{'scenario':<22} {'#':>2} {'query':<22} {'ms':>8} {'budget':>7} {'hit':>7} {'read':>6}  scans")
+    for r in results:
+        flag = "FAIL " if r["problems"] else ""
+        print(
+            f"{r['scenario']:<22} {r['statement']:>2} {r['query'] or '':<22} {r['ms']:>8.2f} {r['budget_ms']:>7g} "
+            f"{r['shared_hit']:>7} {r['shared_read']:>6}  {flag}{', '.join(r['scans'])}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = [r for r in results if r["problems"]]
+    for r in failures:
+        print(f"FAIL {r['scenario']} #{r['statement']}: {'; '.join(r['problems'])}")
+    print(f"{len(results) - len(failures)}/{len(results)} statements passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
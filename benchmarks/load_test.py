@@ -0,0 +1,134 @@
+"""
+Boston Data Dashboard - API Load Test
+Drives a running API with concurrent clients and reports throughput
+
+Usage:
+    uvicorn backend.main:app --port 8000
+    python -m benchmarks.load_test --url http://localhost:8000 --concurrency 16
+
+Runs the same request mix once with a single client and once with the
+requested number of concurrent clients, then reports the throughput gain.
+While the concurrent run is in flight, /api/health is probed to show that
+slow queries no longer stall unrelated requests.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+DEFAULT_PATHS = [
+    "/api/stats?days=365",
+    "/api/permits?days=90&limit=1000",
+    "/api/neighborhoods",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_load(base_url: str, paths: List[str], requests_total: int, concurrency: int) -> Dict:
+    """
+    Issue requests_total requests spread over paths with the given number
+    of concurrent clients. Returns throughput and latency figures.
+    """
+    local = threading.local()
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one_request(i: int):
+        nonlocal errors
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        path = paths[i % len(paths)]
+        start = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=120)
+            ok = response.status_code < 500
+        except requests.exceptions.RequestException:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed_ms)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_request, range(requests_total)))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests_total,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(requests_total / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def probe_health(base_url: str, stop: threading.Event, interval: float = 0.05) -> List[float]:
+    """Poll /api/health until stop is set, returning observed latencies in ms"""
+    latencies = []
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            session.get(base_url + "/api/health", timeout=30)
+        except requests.exceptions.RequestException:
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+        stop.wait(interval)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the dashboard API")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of a running API")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients for the parallel run")
+    parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable)")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    paths = args.paths or DEFAULT_PATHS
+
+    serial = run_load(base_url, paths, args.requests, 1)
+    print(f"1 client:   {serial}")
+
+    stop = threading.Event()
+    health: List[float] = []
+    prober = threading.Thread(target=lambda: health.extend(probe_health(base_url, stop)), daemon=True)
+    prober.start()
+    concurrent = run_load(base_url, paths, args.requests, args.concurrency)
+    stop.set()
+    prober.join()
+    print(f"{args.concurrency} clients: {concurrent}")
+
+    if serial["throughput_rps"]:
+        gain = concurrent["throughput_rps"] / serial["throughput_rps"]
+        print(f"Throughput gain: {gain:.2f}x")
+    if health:
+        print(
+            f"/api/health under load: median {statistics.median(health):.1f} ms, "
+            f"max {max(health):.1f} ms over {len(health)} probes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Boston Data Dashboard - Pagination Benchmark
+Compares offset and keyset (cursor) paging of /api/permits at depth
+
+Usage:
+    DATABASE_URL=postgresql://localhost/boston_permits_bench \
+        python -m benchmarks.pagination --rows 150000 --page-size 100
+
+Seeds synthetic permits if needed, then walks the full listing page by
+page in both modes and reports the query time at increasing depths.
+Totals are skipped (total=none) so only the page query is measured.
+"""
+
+import argparse
+import time
+
+from backend.database import close_pool
+from backend.main import _query_permits
+from .synthetic import seed_database
+
+DEPTHS = [1, 10, 100, 250, 500, 1000, 1500]
+
+
+def walk(mode: str, days: int, page_size: int, max_pages: int) -> dict:
+    """Fetch consecutive pages, returning {page_number: milliseconds}"""
+    timings = {}
+    cursor = None
+    for page in range(1, max_pages + 1):
+        start = time.perf_counter()
+        if mode == "cursor":
+            result = _query_permits(None, None, days, page_size, 0, cursor, total_mode="none")
+            cursor = result["next_cursor"]
+        else:
+            result = _query_permits(
+                None, None, days, page_size, (page - 1) * page_size, total_mode="none"
+            )
+        timings[page] = (time.perf_counter() - start) * 1000
+        if result["count"] < page_size:
+            break
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offset vs keyset pagination benchmark")
+    parser.add_argument("--rows", type=int, default=150000, help="Synthetic permits to seed")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    try:
+        total = seed_database(args.rows, years=1)
+        print(f"{total} permits in table")
+        max_pages = max(DEPTHS)
+        offset_times = walk("offset", args.days, args.page_size, max_pages)
+        cursor_times = walk("cursor", args.days, args.page_size, max_pages)
+    finally:
+        close_pool()
+
+    print(f"{'page':>6} {'offset ms':>10} {'cursor ms':>10}")
+    for depth in DEPTHS:
+        if depth in offset_times and depth in cursor_times:
+            print(f"{depth:>6} {offset_times[depth]:>10.2f} {cursor_times[depth]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
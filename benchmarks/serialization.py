@@ -0,0 +1,96 @@
+"""
+Boston Data Dashboard - JSON Serialization Benchmark
+Compares the old serialize_row + jsonable_encoder + json path against
+backend.serialization for a /api/permits-sized response
+
+Usage:
+    python -m benchmarks.serialization --rows 1000 --repeat 200
+
+No database is needed: rows are built from synthetic records with the
+same Python types psycopg returns (date, Decimal, int, str, None).
+"""
+
+import argparse
+import json
+import statistics
+import time
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.main import WORK_TYPE_LABELS, serialize_row
+from backend.normalize import PERMIT_DATA_COLUMNS, normalize_permit
+from backend import serialization
+from .synthetic import generate_batch
+
+NUMERIC_COLUMNS = {"declared_valuation", "total_fees", "latitude", "longitude"}
+
+
+def build_rows(count: int) -> list:
+    """Dict rows shaped like a dict_row fetch of PERMIT_SELECT"""
+    rows = []
+    for row_id, record in enumerate(generate_batch(count, seed=11), 1):
+        values = normalize_permit(record)
+        row = {"id": row_id}
+        for column, value in zip(PERMIT_DATA_COLUMNS, values):
+            if column in NUMERIC_COLUMNS and value is not None:
+                value = Decimal(str(value))
+            row[column] = value
+        rows.append(row)
+    return rows
+
+
+def legacy(rows: list) -> bytes:
+    """What /api/permits did before: per-row conversion, then FastAPI's encoder"""
+    data = []
+    for row in rows:
+        p = serialize_row(row)
+        p["work_type_label"] = WORK_TYPE_LABELS.get(row.get("work_type"), row.get("work_type"))
+        data.append(p)
+    content = jsonable_encoder({"data": data, "count": len(data)})
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast(rows: list) -> bytes:
+    """The current path: rows go straight to FastJSONResponse"""
+    for row in rows:
+        row["work_type_label"] = WORK_TYPE_LABELS.get(row.get("work_type"), row.get("work_type"))
+    return serialization.FastJSONResponse({"data": rows, "count": len(rows)}).body
+
+
+def time_path(encode, rows: list, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        batch = [dict(row) for row in rows]
+        start = time.perf_counter()
+        encode(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(sorted(timings)[int(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization microbenchmark")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=200, help="Encodes per path")
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    assert json.loads(legacy([dict(r) for r in rows])) == json.loads(fast([dict(r) for r in rows])), \
+        "fast path output differs from legacy output"
+
+    encoder = "orjson" if serialization.orjson is not None else "json (orjson not installed)"
+    print(f"{args.rows} rows, {args.repeat} runs, encoder: {encoder}")
+    old = time_path(legacy, rows, args.repeat)
+    new = time_path(fast, rows, args.repeat)
+    print(f"serialize_row + jsonable_encoder: {old}")
+    print(f"FastJSONResponse:                 {new}")
+    print(f"Speedup: {old['median_ms'] / new['median_ms']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
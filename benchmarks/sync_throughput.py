@@ -0,0 +1,209 @@
+"""
+Boston Data Dashboard - Sync Throughput Benchmark
+Runs backend.sync_job.sync_permits against the local CKAN stand-in and
+reports records/sec, peak RSS and time per phase
+
+Usage:
+    DATABASE_URL=postgresql://localhost/boston_permits_bench \
+        python -m benchmarks.sync_throughput --rows 200000 --page-size 10000 --latency 0.2
+
+The stand-in runs in a child process so its dataset and JSON encoding
+don't count against the sync's memory or CPU. Its permit numbers start
+at --start-index, clear of rows seeded by the other benchmarks, and are
+deleted before the first pass so pass 1 measures inserts; later passes
+re-sync the same data (the unchanged path). Fetch and normalize run on
+prefetch threads, so phase times are busy time and can overlap; "wall"
+is the end-to-end time of each pass.
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from backend import sync_job
+from backend.config import settings
+from backend.database import close_pool, get_db_connection, init_db, refresh_daily_rollup
+from .ckan_server import CKAN_MAX_RECORDS
+
+
+@contextmanager
+def ckan_stand_in(args) -> Iterator[str]:
+    """Start benchmarks.ckan_server in a child process; yields its URL"""
+    command = [
+        sys.executable, "-m", "benchmarks.ckan_server",
+        "--rows", str(args.rows),
+        "--years", str(args.years),
+        "--seed", str(args.seed),
+        "--start-index", str(args.start_index),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--max-records", str(args.max_records),
+        "--port", "0",
+    ]
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, text=True, cwd=Path(__file__).parent.parent
+    )
+    try:
+        line = process.stdout.readline()
+        if " at " not in line:
+            raise RuntimeError(f"CKAN stand-in failed to start: {line!r}")
+        yield line.split(" at ", 1)[1].split()[0]
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _current_rss() -> Optional[int]:
+    """Resident set size in bytes (Linux /proc), or None elsewhere"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@contextmanager
+def track_peak_rss(interval: float = 0.05) -> Iterator[Dict]:
+    """Sample RSS in a background thread; the dict holds start/peak bytes"""
+    result = {"start": _current_rss(), "peak": _current_rss()}
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(interval):
+            rss = _current_rss()
+            if rss is not None and (result["peak"] is None or rss > result["peak"]):
+                result["peak"] = rss
+
+    thread = threading.Thread(target=sample, name="rss-sampler", daemon=True)
+    thread.start()
+    try:
+        yield result
+    finally:
+        stop.set()
+        thread.join()
+
+
+def delete_stand_in_rows(args):
+    """Remove the stand-in's permits so the next sync inserts them again"""
+    first = f"SYN{args.start_index:08d}"
+    last = f"SYN{args.start_index + args.rows:08d}"
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM permits WHERE permit_number >= %s AND permit_number < %s",
+                (first, last)
+            )
+            deleted = cur.rowcount
+        refresh_daily_rollup(conn)
+        conn.commit()
+    return deleted
+
+
+def run_pass(days: int, args) -> Dict:
+    """One sync run; phase times, pages and bytes come from its SyncStats"""
+    with track_peak_rss() as rss:
+        start = time.perf_counter()
+        if args.backfill:
+            result = sync_job.backfill_permits(
+                start=date.today() - timedelta(days=days),
+                workers=args.workers,
+                processes=args.processes,
+                requests_per_second=0,
+                resume=False
+            )
+        else:
+            # Never pick up a checkpoint left by an interrupted run
+            result = sync_job.sync_permits(days=days, resume=False)
+        wall = time.perf_counter() - start
+
+    performance = result.pop("performance")
+    mb = 1024 * 1024
+    return {
+        **result,
+        "wall_seconds": round(wall, 3),
+        "records_per_sec": round(result["fetched"] / wall) if wall else 0,
+        "pages": performance["pages_fetched"],
+        "bytes_downloaded": performance["bytes_downloaded"],
+        "phase_seconds": performance["phase_seconds"],
+        "rss_start_mb": round(rss["start"] / mb, 1) if rss["start"] else None,
+        "rss_peak_mb": round(rss["peak"] / mb, 1) if rss["peak"] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync throughput against a local CKAN stand-in")
+    parser.add_argument("--rows", type=int, default=100000, help="Records the stand-in serves")
+    parser.add_argument("--years", type=float, default=5, help="Years of issue dates to spread over")
+    parser.add_argument("--days", type=int, help="Sync window in days (default: the whole dataset)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data")
+    parser.add_argument("--start-index", type=int, default=90000000,
+                        help="First synthetic permit number served")
+    parser.add_argument("--page-size", type=int, default=settings.CKAN_PAGE_SIZE,
+                        help="Records the sync requests per page")
+    parser.add_argument("--max-records", type=int, default=CKAN_MAX_RECORDS,
+                        help="Most rows the stand-in returns per request")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every CKAN request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds on top of --latency")
+    parser.add_argument("--passes", type=int, default=2,
+                        help="Sync passes; pass 1 inserts, later passes find rows unchanged")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Run backfill_permits (parallel windows) instead of sync_permits")
+    parser.add_argument("--workers", type=int, help="Backfill fetch workers (default: BACKFILL_WORKERS)")
+    parser.add_argument("--processes", type=int,
+                        help="Backfill normalize processes (default: BACKFILL_PROCESSES)")
+    parser.add_argument("--keep", action="store_true", help="Leave the synced rows in the database")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    days = args.days or int(args.years * 365) + 1
+    settings.CKAN_PAGE_SIZE = args.page_size
+    settings.CKAN_REQUEST_DELAY = 0
+    logging.getLogger("backend").setLevel(logging.WARNING)
+
+    results = {"config": vars(args), "passes": []}
+    try:
+        init_db()
+        deleted = delete_stand_in_rows(args)
+        if deleted:
+            print(f"Deleted {deleted} permits left by an earlier run")
+
+        with ckan_stand_in(args) as url:
+            settings.CKAN_SQL_API_URL = url
+            for number in range(1, args.passes + 1):
+                run = run_pass(days, args)
+                results["passes"].append(run)
+                phases = ", ".join(f"{p} {s:.2f}s" for p, s in run["phase_seconds"].items())
+                print(
+                    f"pass {number}: {run['fetched']} records in {run['wall_seconds']:.2f}s "
+                    f"({run['records_per_sec']}/s, {run['pages']} pages), "
+                    f"{run['inserted']} inserted, {run['unchanged']} unchanged, "
+                    f"peak RSS {run['rss_peak_mb']} MB"
+                )
+                print(f"  {phases}")
+
+        if not args.keep:
+            delete_stand_in_rows(args)
+    finally:
+        close_pool()
+
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["process_max_rss_mb"] = round(max_rss_kb / 1024, 1)
+    print(f"Process max RSS: {results['process_max_rss_mb']} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Boston Data Dashboard - Synthetic Permit Generator
+Produces realistic CKAN-shaped permit records for benchmarks
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+# Work types weighted roughly like the live dataset (electrical and
+# plumbing dominate, new construction is rare)
+WORK_TYPE_WEIGHTS = {
+    "ELECTRICAL": 30, "PLUMBING": 18, "GAS": 12, "INTREN": 10, "LVOLT": 7,
+    "FA": 5, "EXTREN": 4, "INTEXT": 3, "SOL": 3, "ROOF": 2, "INSUL": 2,
+    "SIDE": 1, "INTDEM": 1, "EXTDEM": 0.5, "FSTTRK": 0.5, "ERT": 0.5,
+    "COO": 0.3, "ADDITION": 0.2, "OTHER": 0.5,
+}
+
+# Boston ZIP codes with approximate centers; weights follow a Zipf-like skew
+ZIP_CENTERS = {
+    "02124": (42.2870, -71.0710), "02125": (42.3150, -71.0580),
+    "02128": (42.3770, -71.0240), "02130": (42.3100, -71.1140),
+    "02131": (42.2840, -71.1240), "02132": (42.2800, -71.1610),
+    "02135": (42.3510, -71.1560), "02116": (42.3490, -71.0770),
+    "02118": (42.3370, -71.0720), "02127": (42.3330, -71.0480),
+    "02119": (42.3240, -71.0850), "02121": (42.3050, -71.0860),
+    "02122": (42.2950, -71.0490), "02126": (42.2740, -71.0940),
+    "02129": (42.3790, -71.0620), "02134": (42.3560, -71.1320),
+    "02136": (42.2553, -71.1286), "02113": (42.3650, -71.0550),
+    "02114": (42.3610, -71.0680), "02115": (42.3420, -71.0920),
+    "02108": (42.3580, -71.0640), "02109": (42.3600, -71.0540),
+    "02110": (42.3570, -71.0520), "02111": (42.3500, -71.0600),
+    "02120": (42.3320, -71.0960), "02210": (42.3485, -71.0413),
+    "02215": (42.3481, -71.1038), "02199": (42.3467, -71.0818),
+}
+
+STREETS = [
+    "Washington St", "Centre St", "Dorchester Ave", "Commonwealth Ave",
+    "Tremont St", "Massachusetts Ave", "Blue Hill Ave", "Beacon St",
+    "Hyde Park Ave", "Columbia Rd", "Boylston St", "Cambridge St",
+    "Harrison Ave", "Adams St", "South St", "Broadway", "Bennington St",
+]
+
+DESCRIPTIONS = [
+    "Install new electrical service and panel upgrade",
+    "Replace water heater in basement",
+    "Kitchen and bathroom renovation, no structural work",
+    "Install roof mounted solar photovoltaic system",
+    "Strip and reroof, replace rotted sheathing",
+    "Build roof deck with stair access",
+    "Replace vinyl siding on rear elevation",
+    "Install gas piping for new range",
+    "Fire alarm upgrade for common areas",
+    "Low voltage wiring for security system",
+    "Interior demolition of non-bearing partitions",
+    "Blown-in insulation per Mass Save program",
+    "Erect new three family dwelling",
+    "Change occupancy from retail to restaurant",
+]
+
+STATUSES = ["Open", "Closed", "Issued", "Expired"]
+OCCUPANCIES = ["1-2FAM", "1-3FAM", "Multi", "Comm", "Mixed", "Other"]
+
+
+def _weighted(rng: random.Random, choices: Dict[str, float]) -> str:
+    return rng.choices(list(choices), weights=list(choices.values()))[0]
+
+
+def _zip_weights() -> Dict[str, float]:
+    return {z: 1.0 / (rank + 1) for rank, z in enumerate(ZIP_CENTERS)}
+
+
+def generate_ckan_records(
+    count: int,
+    years: float = 5,
+    seed: int = 42,
+    start_index: int = 0,
+    end_date: Optional[datetime] = None
+) -> Iterator[Dict]:
+    """
+    Yield count CKAN-shaped permit records with skewed ZIP/work type
+    distributions, issue dates spread over the last `years` years and
+    coordinates scattered around each ZIP center. Values are formatted
+    the way the live API returns them (currency strings, text numbers).
+    """
+    rng = random.Random(seed + start_index)
+    zip_weights = _zip_weights()
+    end_date = end_date or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    span_days = max(1, int(years * 365))
+
+    for i in range(start_index, start_index + count):
+        work_type = _weighted(rng, WORK_TYPE_WEIGHTS)
+        zip_code = _weighted(rng, zip_weights)
+        center_lat, center_lng = ZIP_CENTERS[zip_code]
+        # Recent permits are more common than old ones
+        age_days = int(rng.triangular(0, span_days, 0))
+        issued = end_date - timedelta(days=age_days)
+        valuation = round(rng.lognormvariate(8.5, 1.6), 2)
+
+        yield {
+            "permitnumber": f"SYN{i:08d}",
+            "worktype": work_type,
+            "permittypedescr": f"{work_type.title()} Permit",
+            "description": rng.choice(DESCRIPTIONS),
+            "comments": rng.choice(["", "Per plans on file", "See attached drawings", None]),
+            "applicant": f"Contractor {rng.randint(1, 5000)}",
+            "declared_valuation": f"${valuation:,.2f}",
+            "total_fees": f"${valuation * 0.01 + 50:,.2f}",
+            "issued_date": issued.strftime("%Y-%m-%d %H:%M:%S"),
+            "expiration_date": (issued + timedelta(days=180)).strftime("%Y-%m-%d %H:%M:%S"),
+            "status": rng.choice(STATUSES),
+            "occupancytype": rng.choice(OCCUPANCIES),
+            "sq_feet": str(rng.randint(0, 5000)),
+            "address": f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+            "city": "Boston",
+            "zip": zip_code,
+            "ward": str(rng.randint(1, 22)),
+            "property_id": str(rng.randint(1, 200000)),
+            "parcel_id": f"{rng.randint(100000000, 2200000000):010d}",
+            "y_latitude": str(round(center_lat + rng.gauss(0, 0.006), 7)),
+            "x_longitude": str(round(center_lng + rng.gauss(0, 0.008), 7)),
+        }
+
+
+def generate_batch(count: int, **kwargs) -> List[Dict]:
+    """Materialize generate_ckan_records into a list"""
+    return list(generate_ckan_records(count, **kwargs))
+
+
+def seed_database(rows: int, years: float = 5, seed: int = 42, batch_size: int = 20000) -> int:
+    """
+    Load `rows` synthetic permits into DATABASE_URL through the bulk loader
+    and rebuild the stats rollup. Permit numbers are deterministic, so
+    re-seeding the same size is an idempotent no-op upsert.
+    Returns the number of permits in the table afterwards.
+    """
+    from backend.database import (
+        get_db_connection,
+        init_db,
+        normalize_records,
+        load_permit_rows,
+        refresh_daily_rollup
+    )
+
+    init_db()
+    end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    with get_db_connection() as conn:
+        for start in range(0, rows, batch_size):
+            batch = generate_batch(
+                min(batch_size, rows - start),
+                years=years,
+                seed=seed,
+                start_index=start,
+                end_date=end_date
+            )
+            load_permit_rows(conn, normalize_records(batch))
+            conn.commit()
+        refresh_daily_rollup(conn)
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE permits")
+            cur.execute("SELECT COUNT(*) AS count FROM permits")
+            total = cur.fetchone()['count']
+        conn.commit()
+    return total